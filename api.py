@@ -0,0 +1,200 @@
+# api.py
+# API HTTP somente leitura sobre as operações, independente da interface do Streamlit, para
+# integrações (painel de parede, gabinete do prefeito). Usa a mesma camada de serviço da
+# interface (servicos.py). Todas as respostas têm ETag; com If-None-Match igual a resposta é
+# 304 sem corpo, e nesse caso a listagem e os totais nem chegam a consultar as operações.
+#
+#   python api.py --porta 8502
+#
+#   GET /operacoes?limite=25&cursor=<cursor>   página da listagem (mais recentes primeiro)
+#   GET /operacoes?q=centro                     busca textual (nome, locais, setores)
+#   GET /operacoes/<id>                         operação completa
+#   GET /operacoes/<id>/pdf                     relatório PDF da operação
+#   GET /totais?inicio=AAAA-MM-DD&fim=AAAA-MM-DD&edicao=1ª&edicao=2ª
+#   GET /metricas                               histogramas do processo da API (requisições por rota e
+#                                               consultas SQL) no formato do Prometheus
+#
+# Com GGIM_API_TOKEN definido, as requisições precisam do cabeçalho "Authorization: Bearer <token>".
+import argparse
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from db import get_session, fechar_session, inicializar_banco, get_engine
+from consultas import buscar_operacoes, versao_dados
+from servicos import obter_operacao, operacao_para_dict, pagina_operacoes, pdf_operacao, totais
+from metricas import texto_prometheus, instrumentar_engine, medir_requisicao
+from pdf_cache import hash_operacao
+
+TOKEN = os.environ.get("GGIM_API_TOKEN")
+LIMITE_PADRAO = 25
+LIMITE_MAXIMO = 200
+ROTA_OPERACAO = re.compile(r"/operacoes/(\d+)(/pdf)?")
+
+
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _data(valor, nome):
+    try:
+        return datetime.date.fromisoformat(valor) if valor else None
+    except ValueError:
+        raise ErroRequisicao(400, f"Parâmetro '{nome}' deve estar no formato AAAA-MM-DD.")
+
+
+def _etag_dados(session, caminho, parametros):
+    # ETag fraca das respostas derivadas de várias operações: a versão dos dados (alterada a cada
+    # gravação) mais a consulta. Barata de calcular: uma leitura do resumo, sem tocar nas operações.
+    consulta = json.dumps([caminho, sorted(parametros.items())], ensure_ascii=False, default=str)
+    return f'W/"{versao_dados(session)}-{hashlib.sha256(consulta.encode("utf-8")).hexdigest()[:16]}"'
+
+
+def _rota(caminho):
+    # Rótulo das métricas: o modelo da rota, para que cada id não crie uma série nova
+    if caminho in ("/operacoes", "/totais", "/metricas"):
+        return caminho
+    encontrado = ROTA_OPERACAO.fullmatch(caminho)
+    if encontrado:
+        return "/operacoes/<id>/pdf" if encontrado.group(2) else "/operacoes/<id>"
+    return "desconhecida"
+
+
+class Manipulador(BaseHTTPRequestHandler):
+    server_version = "GGIM-API"
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        parametros = parse_qs(partes.query)
+        caminho = partes.path.rstrip("/") or "/"
+        with medir_requisicao(_rota(caminho)):
+            try:
+                # Comparação em bytes: compare_digest recusa textos com caracteres fora do ASCII
+                enviado = self.headers.get("Authorization", "").encode("utf-8", "surrogateescape")
+                if TOKEN and not hmac.compare_digest(enviado, f"Bearer {TOKEN}".encode("utf-8", "surrogateescape")):
+                    raise ErroRequisicao(401, "Token de acesso ausente ou inválido.")
+                session = get_session()
+                try:
+                    self._rotear(session, caminho, parametros)
+                finally:
+                    fechar_session()
+            except ErroRequisicao as e:
+                self._json(e.status, {"erro": e.mensagem})
+            except Exception as e:
+                self.log_error("Erro ao atender %s: %r", self.path, e)
+                self._json(500, {"erro": "Erro interno."})
+
+    def _rotear(self, session, caminho, parametros):
+        if caminho == "/operacoes":
+            return self._operacoes(session, parametros)
+        if caminho == "/totais":
+            return self._totais(session, parametros)
+        if caminho == "/metricas":
+            return self._enviar(200, texto_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        encontrado = ROTA_OPERACAO.fullmatch(caminho)
+        if encontrado:
+            op = obter_operacao(session, int(encontrado.group(1)))
+            if op is None:
+                raise ErroRequisicao(404, "Operação não encontrada.")
+            if encontrado.group(2):
+                etag = f'"{hash_operacao(op)}-pdf"'
+                if not self._nao_modificado(etag):
+                    self._enviar(200, pdf_operacao(op), "application/pdf", etag,
+                                 {"Content-Disposition": f'inline; filename="operacao_{op.id}.pdf"'})
+                return
+            etag = f'"{hash_operacao(op)}"'
+            if not self._nao_modificado(etag):
+                self._json(200, operacao_para_dict(op), etag)
+            return
+        raise ErroRequisicao(404, "Recurso não encontrado.")
+
+    def _operacoes(self, session, parametros):
+        termos = parametros.get("q", [""])[0].strip()
+        cursor = parametros.get("cursor", [None])[0]
+        try:
+            limite = min(max(int(parametros.get("limite", [LIMITE_PADRAO])[0]), 1), LIMITE_MAXIMO)
+        except ValueError:
+            raise ErroRequisicao(400, "Parâmetro 'limite' deve ser um número inteiro.")
+        etag = _etag_dados(session, "/operacoes", {"q": termos, "cursor": cursor, "limite": limite})
+        if self._nao_modificado(etag):
+            return
+        if termos:
+            itens = [
+                {"id": id, "edicao": edicao, "data": data, "nome_operacao": nome, "trecho": trecho}
+                for id, edicao, data, nome, trecho in buscar_operacoes(session, termos, limite)
+            ]
+            self._json(200, {"itens": itens}, etag)
+            return
+        try:
+            itens, proximo = pagina_operacoes(session, limite, cursor)
+        except ValueError:
+            raise ErroRequisicao(400, "Cursor inválido.")
+        self._json(200, {"itens": itens, "proximo_cursor": proximo}, etag)
+
+    def _totais(self, session, parametros):
+        inicio = _data(parametros.get("inicio", [None])[0], "inicio")
+        fim = _data(parametros.get("fim", [None])[0], "fim")
+        edicoes = parametros.get("edicao", [])
+        etag = _etag_dados(session, "/totais", {"inicio": inicio, "fim": fim, "edicao": edicoes})
+        if not self._nao_modificado(etag):
+            self._json(200, totais(session, inicio, fim, edicoes) or {}, etag)
+
+    def _nao_modificado(self, etag):
+        # Responde 304 quando o cliente já tem a versão atual (comparação fraca, RFC 9110)
+        enviados = self.headers.get("If-None-Match")
+        if not enviados:
+            return False
+        atual = etag.removeprefix("W/")
+        if enviados.strip() != "*" and atual not in (e.strip().removeprefix("W/") for e in enviados.split(",")):
+            return False
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        return True
+
+    def _json(self, status, dados, etag=None):
+        corpo = json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+        self._enviar(status, corpo, "application/json; charset=utf-8", etag)
+
+    def _enviar(self, status, corpo, tipo, etag=None, cabecalhos=None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        # O cliente pode guardar a resposta, mas revalida sempre (requisição condicional barata)
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP somente leitura sobre as operações")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1)")
+    parser.add_argument("--porta", type=int, default=8502, help="Porta (padrão: 8502)")
+    args = parser.parse_args()
+
+    inicializar_banco()
+    instrumentar_engine(get_engine())
+    servidor = ThreadingHTTPServer((args.host, args.porta), Manipulador)
+    print(f"API em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmark.py
+# Mede os caminhos mais usados do sistema sobre o banco atual e grava os tempos em JSON, para
+# comparar versões. Para gerar um banco de teste use gerar_dados.py.
+#
+#   python gerar_dados.py 100000 --banco sqlite:///bench.db
+#   python benchmark.py --banco sqlite:///bench.db --saida antes.json
+#   python benchmark.py --banco sqlite:///bench.db --saida depois.json --comparar antes.json
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+import db
+from db import get_session, fechar_session, inicializar_banco, Operacao
+from consultas import listar_cabecalhos, dataframe_analise, calcular_totais, ler_resumo, buscar_operacoes
+from relatorios import gerar_pdf, gerar_relatorio_geral_pdf
+
+
+def medir(funcao, repeticoes):
+    # Executa `funcao` `repeticoes` vezes (depois de uma execução de aquecimento) e resume os tempos em ms
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "repeticoes": repeticoes,
+        "min_ms": round(tempos[0], 3),
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "p95_ms": round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+        "media_ms": round(statistics.fmean(tempos), 3),
+    }
+
+
+def _paginas(session, quantidade, tamanho=25):
+    # Percorre `quantidade` páginas da listagem, como o usuário clicando em "Próxima"
+    apos = None
+    for _ in range(quantidade):
+        cabecalhos, tem_proxima = listar_cabecalhos(session, tamanho, apos)
+        if not tem_proxima:
+            break
+        apos = (cabecalhos[-1].data, cabecalhos[-1].id)
+
+
+def _renderizar_listagem():
+    # Execução completa do script na página de listagem (consulta + montagem dos elementos)
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file("main.py", default_timeout=120)
+    app.session_state["usuario"] = "benchmark"
+    app.session_state["main_menu"] = "Visualizar Operações"
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+
+
+def casos(session, com_render=True):
+    # {nome: função sem argumentos} dos caminhos medidos
+    hoje = datetime.date.today()
+    ultimo_ano = hoje - datetime.timedelta(days=365)
+    amostra = session.query(Operacao).order_by(Operacao.id.desc()).limit(20).all()
+    resumo = ler_resumo(session)
+
+    medidos = {
+        "listagem_primeira_pagina": lambda: listar_cabecalhos(session, 25),
+        "listagem_10_paginas": lambda: _paginas(session, 10),
+        "analise_dataframe_tudo": lambda: dataframe_analise(session),
+        "analise_dataframe_ultimo_ano": lambda: dataframe_analise(session, ultimo_ano, hoje),
+        "relatorio_geral_resumo": lambda: ler_resumo(session),
+        "relatorio_geral_filtrado": lambda: calcular_totais(session, ultimo_ano, hoje),
+        "busca_textual": lambda: buscar_operacoes(session, "centro"),
+        "pdf_20_operacoes": lambda: [gerar_pdf(op) for op in amostra],
+        "pdf_relatorio_geral": lambda: gerar_relatorio_geral_pdf(resumo),
+    }
+    if com_render:
+        medidos["listagem_render"] = _renderizar_listagem
+    return medidos
+
+
+def _versao():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(repeticoes=10, filtro=None, com_render=True):
+    session = get_session()
+    try:
+        resultados = {}
+        for nome, funcao in casos(session, com_render).items():
+            if filtro and filtro not in nome:
+                continue
+            resultados[nome] = medir(funcao, repeticoes)
+            print(f"{nome:32} mediana {resultados[nome]['mediana_ms']:10.2f} ms   p95 {resultados[nome]['p95_ms']:10.2f} ms")
+        operacoes = session.query(Operacao).count()
+    finally:
+        fechar_session()
+    return {
+        "versao": _versao(),
+        "executado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "banco": db.DATABASE_URL,
+        "operacoes": operacoes,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, anterior):
+    # Variação da mediana de cada caso em relação a uma execução anterior
+    print(f"\nComparação com {anterior.get('versao')} ({anterior.get('operacoes')} operações):")
+    for nome, medida in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(nome)
+        if not antes or not antes["mediana_ms"]:
+            continue
+        variacao = (medida["mediana_ms"] - antes["mediana_ms"]) / antes["mediana_ms"] * 100
+        print(f"{nome:32} {antes['mediana_ms']:10.2f} -> {medida['mediana_ms']:10.2f} ms  ({variacao:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede os tempos dos caminhos principais do sistema")
+    parser.add_argument("--banco", help="URL do banco medido (padrão: o banco do sistema)")
+    parser.add_argument("--repeticoes", type=int, default=10, help="Repetições de cada caso (padrão: 10)")
+    parser.add_argument("--filtro", help="Mede apenas os casos cujo nome contém este texto")
+    parser.add_argument("--sem-render", action="store_true", help="Não mede a execução do script do Streamlit")
+    parser.add_argument("--saida", default=f"benchmark_{datetime.datetime.now():%Y%m%d_%H%M%S}.json", help="Arquivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    if args.banco:
+        db.DATABASE_URL = args.banco
+    inicializar_banco()
+    resultado = executar(args.repeticoes, args.filtro, not args.sem_render)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.saida}.")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultado, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
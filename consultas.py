@@ -0,0 +1,267 @@
+# consultas.py
+# Consultas de leitura usadas pelas páginas do sistema
+import re
+from sqlalchemy import and_, or_, func, select, text, Integer, String, Date
+from config import BANCO
+from db import (
+    busca_disponivel, em_blocos, TABELA_BUSCA, Operacao, ApreensaoItem, TipoApreensao, ForcaEmpregada, Forca,
+    Local, OperacaoLocal, ResumoGeral, ResumoApreensao, ResumoForca,
+)
+
+
+def listar_cabecalhos(session, limite, apos=None):
+    # Retorna uma página de cabeçalhos (id, edicao, nome_operacao, data) em ordem decrescente
+    # de (data, id) e se existe uma próxima página. `apos` é o (data, id) do último item da
+    # página anterior: a busca usa o índice em vez de OFFSET, então o custo não cresce com a página.
+    query = session.query(Operacao.id, Operacao.edicao, Operacao.nome_operacao, Operacao.data)
+    if apos is not None:
+        data, op_id = apos
+        query = query.filter(or_(Operacao.data < data, and_(Operacao.data == data, Operacao.id < op_id)))
+    linhas = query.order_by(Operacao.data.desc(), Operacao.id.desc()).limit(limite + 1).all()
+    return linhas[:limite], len(linhas) > limite
+
+
+def _consulta_fts(termos):
+    # Cada palavra digitada vira um termo entre aspas com busca por prefixo ("pra"* encontra "praça");
+    # a sintaxe do FTS5 nunca é interpretada a partir do texto do usuário
+    return " ".join(f'"{palavra}"*' for palavra in re.findall(r"\w+", termos))
+
+
+def buscar_operacoes(session, termos, limite=50):
+    # Operações cujo nome, locais ou setores contêm todas as palavras, da mais à menos relevante
+    # (bm25, com peso maior para o nome). `nome` e `trecho` vêm com os termos entre ** (markdown).
+    consulta = _consulta_fts(termos)
+    if not consulta or not busca_disponivel(session.get_bind()):
+        return []
+    sql = text(f"""
+        SELECT o.id, o.edicao, o.data,
+               highlight({TABELA_BUSCA}, 0, '**', '**') AS nome,
+               snippet({TABELA_BUSCA}, -1, '**', '**', '…', 16) AS trecho
+        FROM {TABELA_BUSCA}
+        JOIN operacoes o ON o.id = {TABELA_BUSCA}.rowid
+        WHERE {TABELA_BUSCA} MATCH :consulta
+        ORDER BY bm25({TABELA_BUSCA}, 10.0, 2.0, 2.0)
+        LIMIT :limite
+    """).columns(id=Integer, edicao=String, data=Date, nome=String, trecho=String)
+    return session.execute(sql, {"consulta": consulta, "limite": limite}).all()
+
+
+def filtrar_operacoes(query, inicio=None, fim=None, edicoes=None):
+    # Aplica os filtros de período e edição como cláusulas WHERE (atendidas pelos índices)
+    if inicio is not None:
+        query = query.filter(Operacao.data >= inicio)
+    if fim is not None:
+        query = query.filter(Operacao.data <= fim)
+    if edicoes:
+        query = query.filter(Operacao.edicao.in_(edicoes))
+    return query
+
+
+def tem_filtro(inicio=None, fim=None, edicoes=None):
+    return inicio is not None or fim is not None or bool(edicoes)
+
+
+def listar_edicoes(session):
+    return [e for (e,) in session.execute(select(Operacao.edicao).distinct().order_by(Operacao.edicao)) if e]
+
+
+def total_apreensoes_por_operacao():
+    # Total de apreensões da operação corrente, como subconsulta correlacionada (usa o índice por operação)
+    return (
+        select(func.coalesce(func.sum(ApreensaoItem.quantidade), 0))
+        .where(ApreensaoItem.operacao_id == Operacao.id)
+        .scalar_subquery()
+    )
+
+
+def versao_dados(session):
+    # Carimbo de versão dos dados: muda a cada gravação, exclusão ou reconstrução do resumo
+    return session.execute(select(ResumoGeral.versao).where(ResumoGeral.id == 1)).scalar() or 0
+
+
+def ler_dataframe(session, query, tamanho=None, **opcoes):
+    # DataFrame de uma consulta lido em streaming, em blocos de `tamanho` linhas: o driver não
+    # precisa manter o resultado inteiro em memória junto com o DataFrame montado
+    import pandas as pd  # Importado sob demanda: as páginas sem DataFrame não pagam a importação
+    tamanho = tamanho or BANCO["yield_per"]
+    blocos = pd.read_sql(em_blocos(query, tamanho), session.connection(), chunksize=tamanho, **opcoes)
+    return pd.concat(blocos, ignore_index=True)
+
+
+def dataframe_analise(session, inicio=None, fim=None, edicoes=None):
+    # DataFrame da "Análise de Dados" em duas consultas: as operações filtradas (com o total de
+    # apreensões agregado no banco) e os itens de apreensão, agrupados em texto pelo pandas.
+    operacoes = filtrar_operacoes(
+        select(
+            Operacao.id,
+            Operacao.data.label("Data"),
+            Operacao.pessoas_abordadas.label("Abordados"),
+            Operacao.estabelecimentos_fiscalizados.label("Fiscalizados"),
+            Operacao.pessoas_conduzidas.label("Conduzidos"),
+            Operacao.tco.label("TCOs"),
+            Operacao.interditados.label("Interditados"),
+            total_apreensoes_por_operacao().label("Total Apreensões"),
+            Operacao.edicao,
+            Operacao.nome_operacao,
+        ),
+        inicio, fim, edicoes,
+    ).order_by(Operacao.data, Operacao.id)
+    df = ler_dataframe(session, operacoes, parse_dates=["Data"])
+    if df.empty:
+        return df
+
+    itens = select(ApreensaoItem.operacao_id, TipoApreensao.nome, ApreensaoItem.quantidade).join(
+        TipoApreensao, TipoApreensao.id == ApreensaoItem.tipo_id
+    )
+    if tem_filtro(inicio, fim, edicoes):
+        itens = filtrar_operacoes(itens.join(Operacao, Operacao.id == ApreensaoItem.operacao_id), inicio, fim, edicoes)
+    itens = ler_dataframe(session, itens.order_by(ApreensaoItem.id))
+    detalhes = (itens["nome"] + ": " + itens["quantidade"].astype(str)).groupby(itens["operacao_id"]).agg(", ".join)
+
+    df.insert(2, "Data Formatada", df["Data"].dt.strftime("%d/%m/%Y"))
+    df["Operação"] = df["edicao"] + " - " + df["nome_operacao"]
+    df["Apreensões Detalhadas Formatadas"] = df["id"].map(detalhes).fillna("N/A")
+    return df.drop(columns=["edicao", "nome_operacao"])
+
+
+def totais_gerais(session, inicio=None, fim=None, edicoes=None):
+    # Somatórios dos resultados numéricos das operações filtradas, calculados no banco
+    linha = session.execute(filtrar_operacoes(
+        select(
+            func.count(Operacao.id).label("operacoes"),
+            func.coalesce(func.sum(Operacao.pessoas_abordadas), 0).label("pessoas_abordadas"),
+            func.coalesce(func.sum(Operacao.estabelecimentos_fiscalizados), 0).label("estabelecimentos_fiscalizados"),
+            func.coalesce(func.sum(Operacao.pessoas_conduzidas), 0).label("pessoas_conduzidas"),
+            func.coalesce(func.sum(Operacao.tco), 0).label("tco"),
+            func.coalesce(func.sum(Operacao.interditados), 0).label("interditados"),
+        ),
+        inicio, fim, edicoes,
+    )).one()
+    return dict(linha._mapping)
+
+
+def totais_por_tipo_apreensao(session, inicio=None, fim=None, edicoes=None):
+    # {tipo: quantidade} somado por tipo de apreensão nas operações filtradas
+    query = (
+        select(TipoApreensao.nome, func.sum(ApreensaoItem.quantidade))
+        .join(ApreensaoItem, ApreensaoItem.tipo_id == TipoApreensao.id)
+    )
+    if tem_filtro(inicio, fim, edicoes):
+        query = filtrar_operacoes(query.join(Operacao, Operacao.id == ApreensaoItem.operacao_id), inicio, fim, edicoes)
+    linhas = session.execute(
+        query.group_by(TipoApreensao.id, TipoApreensao.nome).order_by(TipoApreensao.nome)
+    ).all()
+    return {nome: total for nome, total in linhas}
+
+
+def totais_por_forca(session, inicio=None, fim=None, edicoes=None):
+    # {força: viaturas} somado por força empregada nas operações filtradas
+    query = (
+        select(Forca.nome, func.sum(ForcaEmpregada.viaturas))
+        .join(ForcaEmpregada, ForcaEmpregada.forca_id == Forca.id)
+    )
+    if tem_filtro(inicio, fim, edicoes):
+        query = filtrar_operacoes(query.join(Operacao, Operacao.id == ForcaEmpregada.operacao_id), inicio, fim, edicoes)
+    linhas = session.execute(
+        query.group_by(Forca.id, Forca.nome).order_by(Forca.nome)
+    ).all()
+    return {nome: total for nome, total in linhas}
+
+
+ORDENS_LOCAIS = {
+    "mais_visitados": "Mais fiscalizados",
+    "menos_recentes": "Há mais tempo sem fiscalização",
+    "mais_recentes": "Fiscalizados mais recentemente",
+}
+
+# Ordenação de cada ranking sobre as colunas agregadas (visitas, ultima_visita)
+_ORDENACAO_LOCAIS = {
+    "mais_visitados": lambda c: (c.visitas.desc(), c.ultima_visita.desc(), c.local_id),
+    "menos_recentes": lambda c: (c.ultima_visita.asc(), c.visitas.desc(), c.local_id),
+    "mais_recentes": lambda c: (c.ultima_visita.desc(), c.visitas.desc(), c.local_id),
+}
+
+
+def ranking_locais(session, ordem="mais_visitados", limite=20, inicio=None, fim=None, edicoes=None):
+    # Visitas, primeira e última visita por local fiscalizado, agregadas sobre o índice
+    # (local_id, data) de OperacaoLocal; os nomes são lidos só para os `limite` locais do ranking.
+    # O intervalo médio é a média de dias entre visitas consecutivas (da primeira à última).
+    query = select(
+        OperacaoLocal.local_id,
+        func.count().label("visitas"),
+        func.min(OperacaoLocal.data).label("primeira_visita"),
+        func.max(OperacaoLocal.data).label("ultima_visita"),
+    )
+    if inicio is not None:
+        query = query.where(OperacaoLocal.data >= inicio)
+    if fim is not None:
+        query = query.where(OperacaoLocal.data <= fim)
+    if edicoes:
+        query = query.join(Operacao, Operacao.id == OperacaoLocal.operacao_id).where(Operacao.edicao.in_(edicoes))
+    ordenacao = _ORDENACAO_LOCAIS[ordem]
+    agregados = (
+        query.group_by(OperacaoLocal.local_id)
+        .order_by(*ordenacao(query.selected_columns))
+        .limit(limite)
+        .subquery()
+    )
+    linhas = session.execute(
+        select(Local.nome, agregados.c.visitas, agregados.c.primeira_visita, agregados.c.ultima_visita)
+        .join(agregados, agregados.c.local_id == Local.id)
+        .order_by(*ordenacao(agregados.c))
+    ).all()
+    return [
+        {
+            "local": nome,
+            "visitas": visitas,
+            "primeira_visita": primeira,
+            "ultima_visita": ultima,
+            "intervalo_medio_dias": (
+                round((ultima - primeira).days / (visitas - 1), 1) if visitas > 1 and primeira and ultima else None
+            ),
+        }
+        for nome, visitas, primeira, ultima in linhas
+    ]
+
+
+def calcular_totais(session, inicio=None, fim=None, edicoes=None):
+    # Mesmo formato de ler_resumo(), calculado por agregação no banco sobre as operações filtradas
+    totais = totais_gerais(session, inicio, fim, edicoes)
+    detalhes_apreensoes = totais_por_tipo_apreensao(session, inicio, fim, edicoes)
+    detalhes_forcas = totais_por_forca(session, inicio, fim, edicoes)
+    totais["total_apreensoes"] = sum(detalhes_apreensoes.values())
+    totais["total_viaturas_empregadas"] = sum(detalhes_forcas.values())
+    totais["detalhes_apreensoes"] = detalhes_apreensoes
+    totais["detalhes_forcas"] = detalhes_forcas
+    return totais
+
+
+def ler_resumo(session):
+    # Totais do "Relatório Geral" lidos do resumo materializado (sem varrer as operações)
+    resumo = session.get(ResumoGeral, 1)
+    if resumo is None:
+        return None
+    apreensoes = session.execute(
+        select(TipoApreensao.nome, ResumoApreensao.quantidade)
+        .join(TipoApreensao, TipoApreensao.id == ResumoApreensao.tipo_id)
+        .where(ResumoApreensao.quantidade != 0)
+        .order_by(TipoApreensao.nome)
+    ).all()
+    forcas = session.execute(
+        select(Forca.nome, ResumoForca.viaturas)
+        .join(Forca, Forca.id == ResumoForca.forca_id)
+        .where(ResumoForca.viaturas != 0)
+        .order_by(Forca.nome)
+    ).all()
+    return {
+        "operacoes": resumo.operacoes,
+        "pessoas_abordadas": resumo.pessoas_abordadas,
+        "estabelecimentos_fiscalizados": resumo.estabelecimentos_fiscalizados,
+        "pessoas_conduzidas": resumo.pessoas_conduzidas,
+        "tco": resumo.tco,
+        "interditados": resumo.interditados,
+        "total_apreensoes": resumo.total_apreensoes,
+        "total_viaturas_empregadas": resumo.total_viaturas,
+        "detalhes_apreensoes": dict(apreensoes),
+        "detalhes_forcas": dict(forcas),
+    }
@@ -1,8 +1,24 @@
 # db.py
-from sqlalchemy import create_engine, Column, Integer, String, Date, Text
-from sqlalchemy.orm import sessionmaker, declarative_base
+import datetime
+import json
+import re
+import threading
+import unicodedata
+from collections import Counter
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Date, DateTime, Text, Index, ForeignKey, inspect, select, exists, func, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base, relationship
+from config import BANCO
 Base = declarative_base()
 
+# Vem da configuração (config.py); os scripts com --banco o substituem antes do primeiro get_engine()
+DATABASE_URL = BANCO["url"]
+
+# Sessões por thread: cada execução do script do Streamlit usa a sua e a descarta no final
+SessionLocal = scoped_session(sessionmaker())
+_engine = None
+_engine_lock = threading.Lock()
+
 class Usuario(Base):
     __tablename__ = 'usuarios'
     id = Column(Integer, primary_key=True)
@@ -12,9 +28,9 @@ class Usuario(Base):
 class Operacao(Base):
     __tablename__ = 'operacoes'
     id = Column(Integer, primary_key=True)
-    edicao = Column(String)
-    nome_operacao = Column(String)
-    data = Column(Date)
+    edicao = Column(String, index=True)
+    nome_operacao = Column(String, index=True)
+    data = Column(Date)  # Indexada por ix_operacoes_data_id
     descricao = Column(Text)
     pessoas_abordadas = Column(Integer)
     estabelecimentos_fiscalizados = Column(Integer)
@@ -25,12 +41,526 @@ class Operacao(Base):
     locais = Column(Text)
     forcas = Column(Text)  # JSON com [{nome, viaturas}]
     imagens = Column(Text)
+    # Concorrência otimista: incrementada a cada UPDATE, que só grava se a versão não mudou
+    # desde a leitura (StaleDataError caso contrário). Ver servicos.atualizar_operacao.
+    versao = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Cópia normalizada de `apreensoes` e `forcas`, usada pelas agregações (GROUP BY)
+    itens_apreensao = relationship("ApreensaoItem", cascade="all, delete-orphan")
+    forcas_empregadas = relationship("ForcaEmpregada", cascade="all, delete-orphan")
+    # Cópia normalizada de `locais` (ver definir_locais)
+    locais_visitados = relationship("OperacaoLocal", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_operacoes_data_id", "data", "id"),  # Ordenação e paginação da listagem
+    )
+    __mapper_args__ = {"version_id_col": versao}
+
+# Tabelas de dicionário: cada tipo de apreensão e cada força é gravado uma única vez
+class TipoApreensao(Base):
+    __tablename__ = 'tipos_apreensao'
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, unique=True, nullable=False)
+
+class Forca(Base):
+    __tablename__ = 'forcas'
+    id = Column(Integer, primary_key=True)
+    nome = Column(String, unique=True, nullable=False)
+
+class ApreensaoItem(Base):
+    __tablename__ = 'apreensao_itens'
+    id = Column(Integer, primary_key=True)
+    operacao_id = Column(Integer, ForeignKey('operacoes.id', ondelete='CASCADE'), nullable=False, index=True)
+    tipo_id = Column(Integer, ForeignKey('tipos_apreensao.id'), nullable=False, index=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+
+class ForcaEmpregada(Base):
+    __tablename__ = 'forcas_empregadas'
+    id = Column(Integer, primary_key=True)
+    operacao_id = Column(Integer, ForeignKey('operacoes.id', ondelete='CASCADE'), nullable=False, index=True)
+    forca_id = Column(Integer, ForeignKey('forcas.id'), nullable=False, index=True)
+    viaturas = Column(Integer, nullable=False, default=0)
+
+# Locais fiscalizados, extraídos do texto livre `Operacao.locais` (separados por vírgula).
+# `chave` é o nome normalizado (minúsculas, sem acentos e sem espaços repetidos), que une
+# grafias diferentes do mesmo local; `nome` guarda a primeira grafia cadastrada.
+class Local(Base):
+    __tablename__ = 'locais'
+    id = Column(Integer, primary_key=True)
+    chave = Column(String, unique=True, nullable=False)
+    nome = Column(String, nullable=False)
+
+class OperacaoLocal(Base):
+    __tablename__ = 'operacao_locais'
+    operacao_id = Column(Integer, ForeignKey('operacoes.id', ondelete='CASCADE'), primary_key=True)
+    local_id = Column(Integer, ForeignKey('locais.id'), primary_key=True)
+    # Cópia de Operacao.data: visitas, última visita e frequência por local saem só do índice
+    # (local_id, data), sem ler as operações
+    data = Column(Date)
+
+    __table_args__ = (
+        Index("ix_operacao_locais_local_data", "local_id", "data"),
+    )
+
+# Resumo materializado do "Relatório Geral", mantido por deltas a cada cadastro, edição e
+# exclusão (na mesma transação) e reconstruível com `python db.py reconstruir-resumo`
+CAMPOS_RESUMO = ["pessoas_abordadas", "estabelecimentos_fiscalizados", "pessoas_conduzidas", "tco", "interditados"]
+
+class ResumoGeral(Base):
+    __tablename__ = 'resumo_geral'
+    id = Column(Integer, primary_key=True)  # Linha única (id = 1)
+    operacoes = Column(Integer, nullable=False, default=0)
+    pessoas_abordadas = Column(Integer, nullable=False, default=0)
+    estabelecimentos_fiscalizados = Column(Integer, nullable=False, default=0)
+    pessoas_conduzidas = Column(Integer, nullable=False, default=0)
+    tco = Column(Integer, nullable=False, default=0)
+    interditados = Column(Integer, nullable=False, default=0)
+    total_apreensoes = Column(Integer, nullable=False, default=0)
+    total_viaturas = Column(Integer, nullable=False, default=0)
+    versao = Column(Integer, nullable=False, default=0, server_default="0")  # Incrementada a cada alteração dos dados (chave dos caches)
+
+class ResumoApreensao(Base):
+    __tablename__ = 'resumo_apreensoes'
+    tipo_id = Column(Integer, ForeignKey('tipos_apreensao.id'), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+
+class ResumoForca(Base):
+    __tablename__ = 'resumo_forcas'
+    forca_id = Column(Integer, ForeignKey('forcas.id'), primary_key=True)
+    viaturas = Column(Integer, nullable=False, default=0)
+
+# Contagem de referências dos arquivos do repositório de imagens (ver imagens.py)
+class ImagemArmazenada(Base):
+    __tablename__ = 'imagens_armazenadas'
+    caminho = Column(String, primary_key=True)
+    referencias = Column(Integer, nullable=False, default=0, index=True)
+    atualizado_em = Column(DateTime, nullable=False, default=datetime.datetime.now)
 
 def get_engine():
-    return create_engine("sqlite:///test.db")
+    # Engine único por processo; o pool de conexões é compartilhado por todas as sessões
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _criar_engine(DATABASE_URL)
+                SessionLocal.configure(bind=_engine)
+    return _engine
 
-def get_session():
+def _criar_engine(url):
+    opcoes = {
+        chave: BANCO[chave]
+        for chave in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping", "query_cache_size", "echo")
+    }
+    if url.startswith("sqlite"):
+        # check_same_thread=False: as conexões do pool são usadas por threads diferentes do Streamlit
+        engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": BANCO["sqlite_timeout"]}, **opcoes)
+        event.listen(engine, "connect", _configurar_sqlite)
+        return engine
+    return create_engine(url, **opcoes)
+
+def em_blocos(query, tamanho=None):
+    # Leitura em streaming: as linhas chegam em blocos de `tamanho` (padrão: yield_per da
+    # configuração). Em bancos com cursor no servidor (PostgreSQL, MySQL) o resultado não é
+    # carregado inteiro na memória do cliente; no SQLite o cursor já é incremental.
+    return query.execution_options(yield_per=tamanho or BANCO["yield_per"])
+
+def _configurar_sqlite(conexao, _registro):
+    cursor = conexao.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Leitores não bloqueiam o escritor
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Seguro com WAL e bem mais rápido que FULL
+    cursor.execute("PRAGMA busy_timeout=5000")  # Espera o lock em vez de falhar com "database is locked"
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB de cache de páginas por conexão
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def criar_indices(engine):
+    # create_all não adiciona índices novos a tabelas que já existem
+    for tabela in Base.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(engine, checkfirst=True)
+
+def adicionar_colunas(engine):
+    # create_all não altera tabelas existentes: acrescenta as colunas novas dos modelos.
+    # Colunas NOT NULL precisam de server_default para as linhas que já existem.
+    inspetor = inspect(engine)
+    with engine.begin() as conexao:
+        for tabela in Base.metadata.sorted_tables:
+            if not inspetor.has_table(tabela.name):
+                continue
+            existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name in existentes:
+                    continue
+                ddl = f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {coluna.type.compile(dialect=engine.dialect)}"
+                if coluna.server_default is not None:
+                    ddl += f" DEFAULT {coluna.server_default.arg}"
+                    if not coluna.nullable:
+                        ddl += " NOT NULL"
+                conexao.execute(text(ddl))
+
+# Busca textual (SQLite FTS5) sobre nome, locais e setores das operações. A tabela virtual usa
+# as próprias operações como conteúdo (não duplica o texto) e é mantida pelos triggers abaixo.
+TABELA_BUSCA = "operacoes_fts"
+COLUNAS_BUSCA = ["nome_operacao", "locais", "descricao"]
+
+def busca_disponivel(engine):
+    return engine.dialect.name == "sqlite"
+
+def criar_busca(engine):
+    # Cria o índice e os triggers se ainda não existem; na criação, indexa as operações já gravadas
+    if not busca_disponivel(engine):
+        return
+    colunas = ", ".join(COLUNAS_BUSCA)
+    novos = ", ".join(f"new.{c}" for c in COLUNAS_BUSCA)
+    antigos = ", ".join(f"old.{c}" for c in COLUNAS_BUSCA)
+    with engine.begin() as conexao:
+        existia = inspect(conexao).has_table(TABELA_BUSCA)
+        conexao.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA} USING fts5({colunas}, "
+            f"content='operacoes', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        ))
+        conexao.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_ai AFTER INSERT ON operacoes BEGIN "
+            f"INSERT INTO {TABELA_BUSCA}(rowid, {colunas}) VALUES (new.id, {novos}); END"
+        ))
+        conexao.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_ad AFTER DELETE ON operacoes BEGIN "
+            f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, {colunas}) VALUES ('delete', old.id, {antigos}); END"
+        ))
+        conexao.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_au AFTER UPDATE OF {colunas} ON operacoes BEGIN "
+            f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, {colunas}) VALUES ('delete', old.id, {antigos}); "
+            f"INSERT INTO {TABELA_BUSCA}(rowid, {colunas}) VALUES (new.id, {novos}); END"
+        ))
+        if not existia:
+            reconstruir_busca(conexao)
+
+def reconstruir_busca(conexao):
+    # Reindexa todas as operações (recuperação)
+    conexao.execute(text(f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}) VALUES ('rebuild')"))
+
+def inicializar_banco():
+    # Cria tabelas e índices e aplica as migrações pendentes. Roda uma vez por processo,
+    # fora do caminho das requisições.
     engine = get_engine()
+    # As tabelas normalizadas são preenchidas a partir do JSON na primeira vez que são criadas
+    precisa_migrar = not inspect(engine).has_table(ApreensaoItem.__tablename__)
+    precisa_referencias = not inspect(engine).has_table(ImagemArmazenada.__tablename__)
+    precisa_locais = not inspect(engine).has_table(OperacaoLocal.__tablename__)
+    adicionar_colunas(engine)
     Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    return Session()
\ No newline at end of file
+    criar_indices(engine)
+    criar_busca(engine)
+    session = SessionLocal()
+    try:
+        if precisa_migrar:
+            migrar_json(session)
+        if session.get(ResumoGeral, 1) is None:
+            reconstruir_resumo(session)
+        if precisa_referencias:
+            reconstruir_referencias(session)
+        if precisa_locais:
+            migrar_locais(session)
+    finally:
+        SessionLocal.remove()
+
+def get_session():
+    # Sessão da thread atual; deve ser descartada com fechar_session() ao fim do uso
+    get_engine()
+    return SessionLocal()
+
+def fechar_session():
+    SessionLocal.remove()
+
+def obter_id_por_nome(session, modelo, nome, cache=None):
+    # Retorna o id de `nome` na tabela de dicionário `modelo`, criando o registro se necessário
+    if cache is not None and nome in cache:
+        return cache[nome]
+    registro_id = session.execute(select(modelo.id).where(modelo.nome == nome)).scalar()
+    if registro_id is None:
+        try:
+            with session.begin_nested():
+                registro = modelo(nome=nome)
+                session.add(registro)
+            registro_id = registro.id
+        except IntegrityError:
+            # Outra sessão gravou o mesmo nome ao mesmo tempo
+            registro_id = session.execute(select(modelo.id).where(modelo.nome == nome)).scalar_one()
+    if cache is not None:
+        cache[nome] = registro_id
+    return registro_id
+
+def _nome_apreensao(ap):
+    return (ap.get('tipo') or 'Outros').strip() or 'Outros'
+
+def _nome_forca(f):
+    return (f.get('nome') or 'Desconhecido').strip() or 'Desconhecido'
+
+def definir_apreensoes(session, op, apreensoes, cache=None):
+    # Grava a lista [{tipo, quantidade}] no JSON da operação e nas tabelas normalizadas
+    op.apreensoes = json.dumps(apreensoes)
+    op.itens_apreensao = [
+        ApreensaoItem(tipo_id=obter_id_por_nome(session, TipoApreensao, _nome_apreensao(ap), cache), quantidade=ap.get('quantidade', 0) or 0)
+        for ap in apreensoes
+    ]
+
+def definir_forcas(session, op, forcas, cache=None):
+    # Grava a lista [{nome, viaturas}] no JSON da operação e nas tabelas normalizadas
+    op.forcas = json.dumps(forcas)
+    op.forcas_empregadas = [
+        ForcaEmpregada(forca_id=obter_id_por_nome(session, Forca, _nome_forca(f), cache), viaturas=f.get('viaturas', 0) or 0)
+        for f in forcas
+    ]
+
+def chave_local(nome):
+    # "  Praça  da Sé " -> "praca da se"
+    sem_acento = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.lower().split())
+
+def separar_locais(texto):
+    # [(chave, nome)] dos locais do texto, na ordem em que aparecem e sem repetições
+    locais = {}
+    for parte in re.split(r"[,;\n]", texto or ""):
+        nome = " ".join(parte.split()).strip(".")
+        chave = chave_local(nome)
+        if chave and chave not in locais:
+            locais[chave] = nome
+    return [(chave, nome) for chave, nome in locais.items()]
+
+def obter_id_local(session, chave, nome, cache=None):
+    # Como obter_id_por_nome, mas procurando o local pela chave normalizada
+    if cache is not None and chave in cache:
+        return cache[chave]
+    local_id = session.execute(select(Local.id).where(Local.chave == chave)).scalar()
+    if local_id is None:
+        try:
+            with session.begin_nested():
+                local = Local(chave=chave, nome=nome)
+                session.add(local)
+            local_id = local.id
+        except IntegrityError:
+            local_id = session.execute(select(Local.id).where(Local.chave == chave)).scalar_one()
+    if cache is not None:
+        cache[chave] = local_id
+    return local_id
+
+def definir_locais(session, op, cache=None):
+    # Grava os locais de `op.locais` na tabela normalizada; chamar depois de alterar `locais` ou `data`
+    op.locais_visitados = [
+        OperacaoLocal(local_id=obter_id_local(session, chave, nome, cache), data=op.data)
+        for chave, nome in separar_locais(op.locais)
+    ]
+
+def resolver_ids(session, apreensoes, forcas, locais):
+    # Ids dos dicionários (tipos, forças, locais) de uma gravação, para chamar antes de alterar a
+    # operação e repassar a definir_*: consultar ou criar um registro (o savepoint sempre grava as
+    # alterações pendentes) no meio da edição gravaria a operação pela metade, com um UPDATE e um
+    # passo de versão a mais. Retorna {"tipos": {...}, "forcas": {...}, "locais": {...}}.
+    caches = {"tipos": {}, "forcas": {}, "locais": {}}
+    for ap in apreensoes:
+        obter_id_por_nome(session, TipoApreensao, _nome_apreensao(ap), caches["tipos"])
+    for f in forcas:
+        obter_id_por_nome(session, Forca, _nome_forca(f), caches["forcas"])
+    for chave, nome in separar_locais(locais):
+        obter_id_local(session, chave, nome, caches["locais"])
+    return caches
+
+def migrar_json(session, tamanho_lote=1000):
+    # Copia apreensões e forças do JSON para as tabelas normalizadas nas operações que ainda
+    # não têm itens gravados. Retorna (operações migradas, operações ignoradas por JSON inválido).
+    sem_itens = ~exists().where(ApreensaoItem.operacao_id == Operacao.id) & ~exists().where(ForcaEmpregada.operacao_id == Operacao.id)
+    linhas = session.execute(
+        select(Operacao.id, Operacao.apreensoes, Operacao.forcas).where(sem_itens)
+    ).all()
+
+    tipos, forcas = {}, {}
+    itens, empregadas = [], []
+    migradas = ignoradas = 0
+    for op_id, apreensoes_json, forcas_json in linhas:
+        try:
+            apreensoes = json.loads(apreensoes_json) if apreensoes_json else []
+            forcas_lista = json.loads(forcas_json) if forcas_json else []
+        except json.JSONDecodeError:
+            ignoradas += 1
+            continue
+        for ap in apreensoes:
+            itens.append({"operacao_id": op_id, "tipo_id": obter_id_por_nome(session, TipoApreensao, _nome_apreensao(ap), tipos), "quantidade": ap.get('quantidade', 0) or 0})
+        for f in forcas_lista:
+            empregadas.append({"operacao_id": op_id, "forca_id": obter_id_por_nome(session, Forca, _nome_forca(f), forcas), "viaturas": f.get('viaturas', 0) or 0})
+        migradas += 1
+        if len(itens) + len(empregadas) >= tamanho_lote:
+            _inserir_itens(session, itens, empregadas)
+            itens, empregadas = [], []
+    _inserir_itens(session, itens, empregadas)
+    session.commit()
+    return migradas, ignoradas
+
+def _inserir_itens(session, itens, empregadas):
+    if itens:
+        session.execute(ApreensaoItem.__table__.insert(), itens)
+    if empregadas:
+        session.execute(ForcaEmpregada.__table__.insert(), empregadas)
+
+def inserir_visitas(session, operacoes, cache):
+    # Insere em massa os locais de [(operacao_id, data, separar_locais(...))]: os locais novos são
+    # criados em um único INSERT e os já conhecidos vêm de `cache` ({chave: id}) ou do banco
+    desconhecidas = list({chave for _, _, locais in operacoes for chave, _ in locais if chave not in cache})
+    for i in range(0, len(desconhecidas), 500):
+        cache.update(session.execute(select(Local.chave, Local.id).where(Local.chave.in_(desconhecidas[i:i + 500]))).all())
+    novos = {}
+    for _, _, locais in operacoes:
+        for chave, nome in locais:
+            if chave not in cache:
+                novos.setdefault(chave, nome)
+    if novos:
+        cache.update(session.execute(
+            insert(Local).returning(Local.chave, Local.id), [{"chave": chave, "nome": nome} for chave, nome in novos.items()]
+        ).all())
+    visitas = [
+        {"operacao_id": op_id, "local_id": cache[chave], "data": data}
+        for op_id, data, locais in operacoes for chave, _ in locais
+    ]
+    if visitas:
+        session.execute(insert(OperacaoLocal), visitas)
+
+def migrar_locais(session, tamanho_lote=5000):
+    # Preenche os locais das operações que ainda não têm nenhum gravado. Retorna o número de
+    # operações migradas.
+    linhas = session.execute(
+        select(Operacao.id, Operacao.data, Operacao.locais)
+        .where(Operacao.locais.is_not(None), ~exists().where(OperacaoLocal.operacao_id == Operacao.id))
+    ).all()
+    cache = {}
+    for i in range(0, len(linhas), tamanho_lote):
+        inserir_visitas(session, [(op_id, data, separar_locais(locais)) for op_id, data, locais in linhas[i:i + tamanho_lote]], cache)
+    session.commit()
+    return len(linhas)
+
+def reconstruir_locais(session):
+    # Refaz os locais de todas as operações a partir de Operacao.locais (recuperação)
+    session.execute(delete(OperacaoLocal))
+    session.execute(delete(Local))
+    return migrar_locais(session)
+
+def atualizar_resumo(session, op, sinal):
+    # Soma (sinal=1) ou subtrai (sinal=-1) os números da operação no resumo materializado.
+    # Não faz commit: deve rodar na mesma transação que grava a operação. Na edição, chamar
+    # com -1 antes de alterar a operação e com +1 depois.
+    apreensoes = {}
+    for item in op.itens_apreensao:
+        apreensoes[item.tipo_id] = apreensoes.get(item.tipo_id, 0) + (item.quantidade or 0)
+    viaturas = {}
+    for forca in op.forcas_empregadas:
+        viaturas[forca.forca_id] = viaturas.get(forca.forca_id, 0) + (forca.viaturas or 0)
+
+    valores = {campo: getattr(ResumoGeral, campo) + sinal * (getattr(op, campo) or 0) for campo in CAMPOS_RESUMO}
+    valores["operacoes"] = ResumoGeral.operacoes + sinal
+    valores["total_apreensoes"] = ResumoGeral.total_apreensoes + sinal * sum(apreensoes.values())
+    valores["total_viaturas"] = ResumoGeral.total_viaturas + sinal * sum(viaturas.values())
+    valores["versao"] = ResumoGeral.versao + 1
+    session.execute(update(ResumoGeral).where(ResumoGeral.id == 1).values(**valores))
+
+    for tipo_id, quantidade in apreensoes.items():
+        _somar_no_resumo(session, ResumoApreensao, ResumoApreensao.tipo_id, tipo_id, ResumoApreensao.quantidade, sinal * quantidade)
+    for forca_id, total in viaturas.items():
+        _somar_no_resumo(session, ResumoForca, ResumoForca.forca_id, forca_id, ResumoForca.viaturas, sinal * total)
+
+def _somar_no_resumo(session, modelo, coluna_chave, chave, coluna_valor, delta):
+    resultado = session.execute(update(modelo).where(coluna_chave == chave).values({coluna_valor.key: coluna_valor + delta}))
+    if resultado.rowcount == 0:
+        session.execute(insert(modelo).values({coluna_chave.key: chave, coluna_valor.key: delta}))
+
+def reconstruir_resumo(session):
+    # Recalcula todo o resumo materializado a partir das operações (recuperação)
+    versao = session.execute(select(ResumoGeral.versao).where(ResumoGeral.id == 1)).scalar() or 0
+    session.execute(delete(ResumoApreensao))
+    session.execute(delete(ResumoForca))
+    session.execute(delete(ResumoGeral))
+
+    totais = session.execute(
+        select(func.count(Operacao.id), *[func.coalesce(func.sum(getattr(Operacao, campo)), 0) for campo in CAMPOS_RESUMO])
+    ).one()
+    total_apreensoes = session.execute(select(func.coalesce(func.sum(ApreensaoItem.quantidade), 0))).scalar()
+    total_viaturas = session.execute(select(func.coalesce(func.sum(ForcaEmpregada.viaturas), 0))).scalar()
+    session.add(ResumoGeral(
+        id=1,
+        operacoes=totais[0],
+        total_apreensoes=total_apreensoes,
+        total_viaturas=total_viaturas,
+        versao=versao + 1,
+        **dict(zip(CAMPOS_RESUMO, totais[1:])),
+    ))
+
+    session.execute(insert(ResumoApreensao).from_select(
+        ["tipo_id", "quantidade"],
+        select(ApreensaoItem.tipo_id, func.sum(ApreensaoItem.quantidade)).group_by(ApreensaoItem.tipo_id),
+    ))
+    session.execute(insert(ResumoForca).from_select(
+        ["forca_id", "viaturas"],
+        select(ForcaEmpregada.forca_id, func.sum(ForcaEmpregada.viaturas)).group_by(ForcaEmpregada.forca_id),
+    ))
+    session.commit()
+
+def ajustar_referencias(session, caminhos, delta):
+    # Soma `delta` às referências de cada caminho de imagem (um caminho repetido conta várias vezes).
+    # Não faz commit: roda na mesma transação que grava ou exclui a operação.
+    agora = datetime.datetime.now()
+    for caminho, vezes in Counter(caminhos).items():
+        resultado = session.execute(
+            update(ImagemArmazenada)
+            .where(ImagemArmazenada.caminho == caminho)
+            .values(referencias=ImagemArmazenada.referencias + delta * vezes, atualizado_em=agora)
+        )
+        if resultado.rowcount == 0:
+            session.execute(insert(ImagemArmazenada).values(caminho=caminho, referencias=max(delta * vezes, 0), atualizado_em=agora))
+
+def reconstruir_referencias(session):
+    # Recalcula as referências de todas as imagens a partir de Operacao.imagens (recuperação)
+    contagem = Counter()
+    for (imagens_json,) in session.execute(em_blocos(select(Operacao.imagens))):
+        try:
+            contagem.update(json.loads(imagens_json) if imagens_json else [])
+        except json.JSONDecodeError:
+            continue
+    agora = datetime.datetime.now()
+    session.execute(delete(ImagemArmazenada))
+    if contagem:
+        session.execute(insert(ImagemArmazenada), [
+            {"caminho": caminho, "referencias": vezes, "atualizado_em": agora} for caminho, vezes in contagem.items()
+        ])
+    session.commit()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Manutenção do banco de dados do GGIM")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("migrar", help="Copia apreensões e forças do JSON para as tabelas normalizadas")
+    comandos.add_parser("reconstruir-resumo", help="Recalcula o resumo materializado do Relatório Geral")
+    comandos.add_parser("reconstruir-referencias", help="Recalcula as referências das imagens armazenadas")
+    comandos.add_parser("reconstruir-busca", help="Reindexa a busca textual das operações")
+    comandos.add_parser("reconstruir-locais", help="Refaz a tabela de locais fiscalizados a partir do texto das operações")
+    comandos.add_parser("coletar-imagens", help="Apaga imagens que não são usadas por nenhuma operação")
+    args = parser.parse_args()
+
+    inicializar_banco()
+    session = get_session()
+    if args.comando == "migrar":
+        migradas, ignoradas = migrar_json(session)
+        print(f"{migradas} operações migradas, {ignoradas} ignoradas por JSON inválido.")
+        reconstruir_resumo(session)
+    elif args.comando == "reconstruir-resumo":
+        reconstruir_resumo(session)
+        print("Resumo reconstruído.")
+    elif args.comando == "reconstruir-referencias":
+        reconstruir_referencias(session)
+        print("Referências reconstruídas.")
+    elif args.comando == "reconstruir-busca":
+        reconstruir_busca(session.connection())
+        session.commit()
+        print("Busca reindexada.")
+    elif args.comando == "reconstruir-locais":
+        print(f"{reconstruir_locais(session)} operações com locais reconstruídos.")
+    elif args.comando == "coletar-imagens":
+        from imagens import coletar_orfas
+        print(f"{coletar_orfas(session)} imagens removidas.")
+    fechar_session()
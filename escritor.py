@@ -0,0 +1,109 @@
+# escritor.py
+# Escritor único das gravações da interface. Com vários usuários salvando ao mesmo tempo, cada
+# execução do script abria a própria transação e todas disputavam o lock do banco (no SQLite há
+# um único escritor por vez): as esperas e os erros "database is locked" cresciam com o número
+# de usuários. Aqui as gravações entram em uma fila limitada e são executadas por uma só thread;
+# as que se acumulam enquanto uma transação está em andamento são gravadas juntas, no mesmo
+# commit (uma única sincronização em disco para o lote), e a vazão cresce com a concorrência.
+#
+#   resultado = executar(tarefa)  # tarefa(session); bloqueia até o commit e devolve o retorno
+#
+# A tarefa recebe a sessão do escritor, não faz commit e deve poder ser executada de novo do
+# início (em caso de nova tentativa). Se uma tarefa do lote falhar, o lote é desfeito e as
+# tarefas são regravadas uma a uma, para que a falha de uma não afete as outras. Bloqueios
+# transitórios do banco (ex.: importar.py gravando em outro processo) são repetidos com espera
+# exponencial. Limites e tentativas na seção [escritor] da configuração (config.py).
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from sqlalchemy.exc import OperationalError
+from config import ESCRITOR
+from db import get_session, fechar_session
+from metricas import medir
+
+_fila = queue.Queue(maxsize=ESCRITOR["fila"])
+_thread = None
+_thread_lock = threading.Lock()
+
+
+class FilaCheia(Exception):
+    # Gravações pendentes demais: o envio foi recusado e pode ser repetido em instantes
+    pass
+
+
+def executar(tarefa):
+    # Envia a tarefa ao escritor e espera o commit; exceções da tarefa são repassadas a quem chamou
+    _iniciar()
+    futuro = Future()
+    try:
+        _fila.put((tarefa, futuro), timeout=ESCRITOR["espera_fila"])
+    except queue.Full:
+        raise FilaCheia("Há muitas gravações em andamento. Tente novamente em instantes.")
+    with medir("gravacao"):
+        return futuro.result()
+
+
+def _iniciar():
+    # Thread do escritor criada na primeira gravação (scripts e a API não a iniciam)
+    global _thread
+    if _thread is None:
+        with _thread_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_escrever, name="escritor-banco", daemon=True)
+                _thread.start()
+
+
+def _escrever():
+    while True:
+        lote = [_fila.get()]
+        # Reúne as gravações que chegaram enquanto o lote anterior era gravado
+        while len(lote) < ESCRITOR["lote"]:
+            try:
+                lote.append(_fila.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _gravar(get_session(), lote)
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+        finally:
+            fechar_session()
+
+
+def _transitorio(erro):
+    # Lock do banco ocupado por outra conexão: vale a pena tentar de novo
+    if not isinstance(erro, OperationalError):
+        return False
+    mensagem = str(erro.orig).lower()
+    return "locked" in mensagem or "busy" in mensagem or "deadlock" in mensagem
+
+
+def _gravar(session, lote):
+    # Grava o lote em uma transação e resolve o futuro de cada tarefa
+    espera = ESCRITOR["espera_inicial"]
+    for tentativa in range(1, ESCRITOR["tentativas"] + 1):
+        try:
+            resultados = [tarefa(session) for tarefa, _ in lote]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if _transitorio(e) and tentativa < ESCRITOR["tentativas"]:
+                # Espera exponencial com variação aleatória, para as tentativas não coincidirem
+                time.sleep(espera * (1 + random.random()))
+                espera *= 2
+                continue
+            if len(lote) > 1 and not _transitorio(e):
+                # Separa a tarefa que falhou das demais
+                for item in lote:
+                    _gravar(session, [item])
+                return
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        for (_, futuro), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+        return
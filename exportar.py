@@ -0,0 +1,161 @@
+# exportar.py
+# Exportação das operações em CSV ou XLSX, em formato longo: uma linha por apreensão e por
+# força empregada (ou uma única linha para a operação sem nenhuma das duas).
+# Pela linha de comando, as operações são lidas do banco em blocos (yield_per) e gravadas no
+# arquivo à medida que chegam, então a memória usada não depende do tamanho do histórico.
+# O download da "Análise de Dados" é montado em memória (o Streamlit envia o conteúdo inteiro)
+# e por isso é limitado a [exportacao] limite_interface operações (config.py); exportações
+# maiores são feitas por aqui.
+#
+#   python exportar.py operacoes.csv
+#   python exportar.py operacoes.xlsx --inicio 2024-01-01 --fim 2024-12-31 --edicao "10ª"
+import argparse
+import csv
+import datetime
+import io
+import shlex
+from sqlalchemy import select, func
+from db import get_session, fechar_session, inicializar_banco, em_blocos, Operacao, ApreensaoItem, TipoApreensao, ForcaEmpregada, Forca
+from consultas import filtrar_operacoes
+from config import EXPORTACAO
+
+COLUNAS = [
+    ("id", "ID"),
+    ("edicao", "Edição"),
+    ("nome_operacao", "Nome da Operação"),
+    ("data", "Data"),
+    ("pessoas_abordadas", "Pessoas Abordadas"),
+    ("estabelecimentos_fiscalizados", "Estabelecimentos Fiscalizados"),
+    ("pessoas_conduzidas", "Pessoas Conduzidas"),
+    ("tco", "TCOs Lavrados"),
+    ("interditados", "Estabelecimentos Interditados"),
+    ("locais", "Locais Fiscalizados"),
+    ("descricao", "Setores"),
+    ("registro", "Registro"),
+    ("item", "Item"),
+    ("quantidade", "Quantidade"),
+]
+CAMPOS_OPERACAO = [campo for campo, _ in COLUNAS[:11]]
+
+
+def linhas_exportacao(session, inicio=None, fim=None, edicoes=None, tamanho_bloco=None):
+    # Gera as linhas da exportação (listas na ordem de COLUNAS), bloco a bloco (padrão: yield_per da configuração)
+    query = filtrar_operacoes(
+        select(*[getattr(Operacao, campo) for campo in CAMPOS_OPERACAO]),
+        inicio, fim, edicoes,
+    ).order_by(Operacao.data, Operacao.id)
+    resultado = session.execute(em_blocos(query, tamanho_bloco))
+
+    for bloco in resultado.partitions():
+        ids = [linha.id for linha in bloco]
+        # Detalhes do bloco inteiro em duas consultas (pelo índice de operacao_id)
+        detalhes = {op_id: [] for op_id in ids}
+        for op_id, nome, quantidade in session.execute(
+            select(ApreensaoItem.operacao_id, TipoApreensao.nome, ApreensaoItem.quantidade)
+            .join(TipoApreensao, TipoApreensao.id == ApreensaoItem.tipo_id)
+            .where(ApreensaoItem.operacao_id.in_(ids))
+            .order_by(ApreensaoItem.id)
+        ):
+            detalhes[op_id].append(("Apreensão", nome, quantidade))
+        for op_id, nome, viaturas in session.execute(
+            select(ForcaEmpregada.operacao_id, Forca.nome, ForcaEmpregada.viaturas)
+            .join(Forca, Forca.id == ForcaEmpregada.forca_id)
+            .where(ForcaEmpregada.operacao_id.in_(ids))
+            .order_by(ForcaEmpregada.id)
+        ):
+            detalhes[op_id].append(("Força (viaturas)", nome, viaturas))
+
+        for linha in bloco:
+            base = list(linha)
+            for detalhe in detalhes[linha.id] or [("", "", "")]:
+                yield base + list(detalhe)
+
+
+def escrever_csv(linhas, destino):
+    # `destino` é um arquivo de texto aberto com newline=""
+    escritor = csv.writer(destino, delimiter=";")
+    escritor.writerow([rotulo for _, rotulo in COLUNAS])
+    total = 0
+    for linha in linhas:
+        escritor.writerow(linha)
+        total += 1
+    return total
+
+
+def escrever_xlsx(linhas, destino):
+    # Modo write_only do openpyxl: as linhas vão para o arquivo sem ficar em memória
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Para exportar XLSX instale o openpyxl: pip install openpyxl")
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet("Operações")
+    planilha.append([rotulo for _, rotulo in COLUNAS])
+    total = 0
+    for linha in linhas:
+        planilha.append(linha)
+        total += 1
+    livro.save(destino)
+    return total
+
+
+def comando_exportacao(formato, inicio=None, fim=None, edicoes=None):
+    # Linha de comando equivalente a uma exportação da interface (para as que passam do limite)
+    partes = ["python", "exportar.py", f"operacoes.{formato}"]
+    if inicio:
+        partes += ["--inicio", inicio.isoformat()]
+    if fim:
+        partes += ["--fim", fim.isoformat()]
+    for edicao in edicoes or []:
+        partes += ["--edicao", edicao]
+    return shlex.join(partes)
+
+
+def exportar_bytes(formato, inicio=None, fim=None, edicoes=None):
+    # Gera a exportação em memória e devolve o conteúdo (o st.download_button só aceita bytes,
+    # texto ou arquivos em memória): a memória cresce com o número de linhas, por isso o limite
+    # de operações. Usa uma sessão própria: é chamado fora da execução do script.
+    arquivo = io.BytesIO()
+    try:
+        total = get_session().execute(filtrar_operacoes(select(func.count(Operacao.id)), inicio, fim, edicoes)).scalar()
+        if total > EXPORTACAO["limite_interface"]:
+            raise ValueError(
+                f"{total} operações passam do limite de {EXPORTACAO['limite_interface']} da interface; "
+                f"use {comando_exportacao(formato, inicio, fim, edicoes)}"
+            )
+        linhas = linhas_exportacao(get_session(), inicio, fim, edicoes)
+        if formato == "xlsx":
+            escrever_xlsx(linhas, arquivo)
+        else:
+            texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+            escrever_csv(linhas, texto)
+            texto.flush()
+            texto.detach()
+    finally:
+        fechar_session()
+    return arquivo.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta as operações em CSV ou XLSX")
+    parser.add_argument("saida", help="Arquivo de saída (.csv ou .xlsx)")
+    parser.add_argument("--inicio", type=datetime.date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=datetime.date.fromisoformat, help="Data final (AAAA-MM-DD)")
+    parser.add_argument("--edicao", action="append", default=[], help="Edição a exportar (pode repetir)")
+    args = parser.parse_args()
+
+    inicializar_banco()
+    try:
+        linhas = linhas_exportacao(get_session(), args.inicio, args.fim, args.edicao)
+        if args.saida.lower().endswith(".xlsx"):
+            total = escrever_xlsx(linhas, args.saida)
+        else:
+            with open(args.saida, "w", encoding="utf-8-sig", newline="") as f:
+                total = escrever_csv(linhas, f)
+    finally:
+        fechar_session()
+    print(f"{total} linhas exportadas para {args.saida}.")
+
+
+if __name__ == "__main__":
+    main()
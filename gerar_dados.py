@@ -0,0 +1,119 @@
+# gerar_dados.py
+# Gera operações sintéticas para testes de volume e para o benchmark.py. A mesma semente
+# gera sempre os mesmos dados. As operações são gravadas com importar.inserir_lote, o mesmo
+# caminho da importação em massa, e o resumo é recalculado no final.
+#
+#   python gerar_dados.py 10000
+#   python gerar_dados.py 1000000 --semente 7 --anos 15 --lote 10000
+#   python gerar_dados.py 50000 --banco sqlite:///volume.db
+import argparse
+import datetime
+import io
+import random
+import sys
+import time
+import db
+from db import get_session, fechar_session, inicializar_banco, reconstruir_resumo
+from importar import inserir_lote
+
+BAIRROS = [
+    "Centro", "Jardim América", "Vila Nova", "São José", "Santa Cruz", "Boa Vista", "Industrial",
+    "Parque das Flores", "Bela Vista", "Morada do Sol", "Vila Operária", "Jardim Europa",
+]
+LOGRADOUROS = ["Rua", "Avenida", "Praça", "Travessa", "Estrada"]
+ESTABELECIMENTOS = ["Bar", "Conveniência", "Distribuidora", "Tabacaria", "Lanchonete", "Casa de Shows", "Oficina"]
+SETORES = ["Setor Norte", "Setor Sul", "Setor Leste", "Setor Oeste", "Setor Central"]
+NOMES = ["Cidade Segura", "Noite Tranquila", "Paz nas Ruas", "Perturbação Zero", "Comércio Legal", "Fronteira", "Madrugada"]
+TIPOS_APREENSAO = ["Som", "Veículos", "Motocicletas", "Armas Brancas", "Entorpecentes", "Bebidas", "Cigarros", "Outros"]
+FORCAS = ["GCM", "PM", "PC", "Bombeiros", "Trânsito", "Fiscalização", "Vigilância Sanitária"]
+CORES_IMAGENS = ["#1f4e79", "#2e7d32", "#c62828", "#f9a825", "#6a1b9a", "#37474f"]
+
+
+def imagens_exemplo(quantidade=len(CORES_IMAGENS)):
+    # Pequenos JPEGs gravados no repositório de imagens, reaproveitados pelas operações geradas
+    from PIL import Image
+    from imagens import salvar_imagem
+    caminhos = []
+    for i, cor in enumerate(CORES_IMAGENS[:quantidade]):
+        arquivo = io.BytesIO()
+        Image.new("RGB", (640, 480), cor).save(arquivo, "JPEG")
+        arquivo.name = f"exemplo_{i}.jpg"
+        caminhos.append(salvar_imagem(arquivo))
+    return caminhos
+
+
+def _local(rng):
+    return f"{rng.choice(ESTABELECIMENTOS)} {rng.choice(LOGRADOUROS)} {rng.randint(1, 300)} - {rng.choice(BAIRROS)}"
+
+
+def gerar_operacoes(quantidade, semente=1, anos=10, imagens=()):
+    # Gera (operacao, apreensoes, forcas, imagens) no formato de importar.inserir_lote,
+    # em ordem de data, distribuídas pelos últimos `anos` anos
+    rng = random.Random(semente)
+    fim = datetime.date.today()
+    inicio = fim - datetime.timedelta(days=365 * anos)
+    dias = (fim - inicio).days
+    for i in range(quantidade):
+        data = inicio + datetime.timedelta(days=i * dias // max(quantidade, 1))
+        abordadas = rng.randint(0, 150)
+        operacao = {
+            "edicao": f"{(data.year - inicio.year) * 12 + data.month}ª",
+            "nome_operacao": f"{rng.choice(NOMES)} {rng.choice(BAIRROS)}",
+            "data": data,
+            "descricao": ", ".join(rng.sample(SETORES, rng.randint(1, 3))),
+            "pessoas_abordadas": abordadas,
+            "estabelecimentos_fiscalizados": rng.randint(0, 25),
+            "pessoas_conduzidas": rng.randint(0, max(1, abordadas // 20)),
+            "tco": rng.randint(0, 5),
+            "interditados": rng.choice([0, 0, 0, 1, 2]),
+            "locais": ", ".join(_local(rng) for _ in range(rng.randint(1, 6))),
+        }
+        apreensoes = [{"tipo": tipo, "quantidade": rng.randint(1, 30)} for tipo in rng.sample(TIPOS_APREENSAO, rng.randint(0, 4))]
+        forcas = [{"nome": nome, "viaturas": rng.randint(1, 6)} for nome in rng.sample(FORCAS, rng.randint(1, 4))]
+        fotos = rng.sample(imagens, rng.randint(0, min(3, len(imagens)))) if imagens else []
+        yield operacao, apreensoes, forcas, fotos
+
+
+def popular(quantidade, semente=1, anos=10, tamanho_lote=5000, com_imagens=True, saida=sys.stdout):
+    # Grava as operações geradas e retorna as estatísticas da execução
+    session = get_session()
+    caches = {"tipos": {}, "forcas": {}, "locais": {}}
+    inicio = time.perf_counter()
+    inseridas = 0
+    lote = []
+    try:
+        imagens = imagens_exemplo() if com_imagens else []
+        for item in gerar_operacoes(quantidade, semente, anos, imagens):
+            lote.append(item)
+            if len(lote) >= tamanho_lote:
+                inseridas += len(inserir_lote(session, lote, caches))
+                lote = []
+                print(f"{inseridas}/{quantidade} operações geradas", file=saida)
+        if lote:
+            inseridas += len(inserir_lote(session, lote, caches))
+        reconstruir_resumo(session)
+    finally:
+        fechar_session()
+    decorrido = time.perf_counter() - inicio
+    return {"inseridas": inseridas, "segundos": decorrido}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera operações sintéticas para testes de volume")
+    parser.add_argument("quantidade", type=int, help="Número de operações")
+    parser.add_argument("--semente", type=int, default=1, help="Semente do gerador (padrão: 1)")
+    parser.add_argument("--anos", type=int, default=10, help="Período coberto, em anos até hoje (padrão: 10)")
+    parser.add_argument("--lote", type=int, default=5000, help="Operações por transação (padrão: 5000)")
+    parser.add_argument("--sem-imagens", action="store_true", help="Não associa imagens de exemplo às operações")
+    parser.add_argument("--banco", help="URL do banco de destino (padrão: o banco do sistema)")
+    args = parser.parse_args()
+
+    if args.banco:
+        db.DATABASE_URL = args.banco
+    inicializar_banco()
+    resultado = popular(args.quantidade, args.semente, args.anos, args.lote, not args.sem_imagens)
+    print(f"{resultado['inseridas']} operações geradas em {resultado['segundos']:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# graficos.py
+# Séries do gráfico "Estatísticas das Operações": agregação por semana, mês ou trimestre,
+# média móvel e redução de pontos. O volume enviado ao navegador fica limitado por
+# MAX_BARRAS / MAX_PONTOS, independente do tamanho do histórico.
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+METRICAS = ["Abordados", "Fiscalizados", "Conduzidos", "TCOs", "Interditados", "Total Apreensões"]
+
+# Do mais detalhado ao mais agregado; o valor é a frequência de período do pandas
+AGRUPAMENTOS = {
+    "Por operação": None,
+    "Semana": "W",
+    "Mês": "M",
+    "Trimestre": "Q",
+}
+ROTULOS = {"Semana": "%d/%m/%Y", "Mês": "%m/%Y", "Trimestre": "T%q/%Y"}
+
+MAX_BARRAS = 120  # Acima disso o gráfico passa a ser de linhas (WebGL)
+MAX_PONTOS = 1000  # Pontos por série no gráfico de linhas
+
+
+def quantidade_periodos(df, agrupamento):
+    frequencia = AGRUPAMENTOS[agrupamento]
+    if frequencia is None:
+        return len(df)
+    return len(pd.period_range(df["Data"].min(), df["Data"].max(), freq=frequencia))
+
+
+def escolher_agrupamento(df):
+    # O agrupamento mais detalhado que cabe em MAX_BARRAS barras por métrica
+    for agrupamento in AGRUPAMENTOS:
+        if quantidade_periodos(df, agrupamento) <= MAX_BARRAS:
+            return agrupamento
+    return list(AGRUPAMENTOS)[-1]
+
+
+def agregar(df, agrupamento):
+    # Soma das métricas por período (períodos sem operação entram com zero), indexada pelo
+    # período; "Por operação" mantém uma linha por operação, indexada pela data
+    frequencia = AGRUPAMENTOS[agrupamento]
+    if frequencia is None:
+        return df.set_index("Data")[METRICAS]
+    periodos = df["Data"].dt.to_period(frequencia)
+    serie = df[METRICAS].groupby(periodos).sum()
+    return serie.reindex(pd.period_range(periodos.min(), periodos.max(), freq=frequencia), fill_value=0)
+
+
+def media_movel(serie, janela):
+    return serie.rolling(janela, min_periods=1).mean()
+
+
+def reduzir(x, y, maximo=MAX_PONTOS):
+    # Mantém o mínimo e o máximo de cada intervalo (os picos continuam visíveis)
+    if len(y) <= maximo:
+        return x, y
+    limites = np.linspace(0, len(y), maximo // 2 + 1, dtype=int)
+    indices = []
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        trecho = y[inicio:fim]
+        indices.extend((inicio + trecho.argmin(), inicio + trecho.argmax()))
+    indices = np.unique(indices)
+    return x[indices], y[indices]
+
+
+def _eixo_x(serie, agrupamento, datas):
+    # Datas reais para o eixo temporal das linhas; rótulos de texto para as barras
+    if isinstance(serie.index, pd.PeriodIndex):
+        return serie.index.to_timestamp() if datas else serie.index.strftime(ROTULOS[agrupamento])
+    return serie.index if datas else serie.index.strftime("%d/%m/%Y")
+
+
+def figura_estatisticas(serie, agrupamento, titulo, linhas=False):
+    # Barras agrupadas quando cabem em MAX_BARRAS; senão (ou com `linhas`) linhas em WebGL
+    fig = go.Figure()
+    if len(serie) <= MAX_BARRAS and not linhas:
+        x = _eixo_x(serie, agrupamento, datas=False)
+        for metrica in METRICAS:
+            fig.add_trace(go.Bar(x=x, y=serie[metrica], name=metrica))
+        fig.update_layout(barmode="group", xaxis_type="category")
+    else:
+        x = np.asarray(_eixo_x(serie, agrupamento, datas=True))
+        for metrica in METRICAS:
+            x_reduzido, y_reduzido = reduzir(x, serie[metrica].to_numpy())
+            fig.add_trace(go.Scattergl(x=x_reduzido, y=y_reduzido, name=metrica, mode="lines"))
+    fig.update_layout(title=titulo, yaxis_title="Quantidade", legend_title="Métrica")
+    return fig
@@ -0,0 +1,177 @@
+# imagens.py
+# Armazenamento das imagens das operações e das suas versões reduzidas.
+# Os originais são endereçados pelo conteúdo (imagens/<2 primeiros hex>/<sha256>.<ext>): a
+# mesma foto enviada duas vezes é gravada uma só vez e nomes iguais nunca se sobrescrevem.
+# O número de referências de cada arquivo fica em db.ImagemArmazenada; arquivos sem
+# referência são apagados por uma coleta em segundo plano, fora das requisições.
+# No upload são geradas uma miniatura (listagem e edição) e uma versão de exibição com
+# tamanho limitado; o original só é lido quando pedido explicitamente.
+import datetime
+import hashlib
+import os
+import threading
+import time
+import uuid
+from PIL import Image, ImageOps
+from sqlalchemy import select, delete
+from db import get_session, fechar_session, ImagemArmazenada
+
+PASTA_IMAGENS = "imagens"
+PASTA_MINIATURAS = os.path.join(PASTA_IMAGENS, "miniaturas")
+PASTA_EXIBICAO = os.path.join(PASTA_IMAGENS, "exibicao")
+PASTA_TEMPORARIA = os.path.join(PASTA_IMAGENS, "tmp")
+
+TAMANHO_BLOCO = 1024 * 1024  # Uploads são copiados em blocos de 1 MB
+CARENCIA_SEGUNDOS = 15 * 60  # Idade mínima de um arquivo sem referência antes de ser apagado
+INTERVALO_COLETA = 10 * 60
+ultimo_erro_coleta = None  # (quando, mensagem) da última coleta que falhou; exibido no painel de desempenho
+
+TAMANHO_MINIATURA = 320  # Maior lado, em pixels
+TAMANHO_EXIBICAO = 1280
+QUALIDADE_JPEG = 80
+
+
+def salvar_imagem(img):
+    # Copia o arquivo enviado em blocos, calculando o hash durante a cópia, e gera as versões
+    # reduzidas. Retorna o caminho endereçado pelo conteúdo. A referência é contada apenas
+    # quando a operação é gravada (db.ajustar_referencias).
+    os.makedirs(PASTA_TEMPORARIA, exist_ok=True)
+    temporario = os.path.join(PASTA_TEMPORARIA, uuid.uuid4().hex)
+    resumo = hashlib.sha256()
+    img.seek(0)
+    with open(temporario, "wb") as f:
+        while bloco := img.read(TAMANHO_BLOCO):
+            resumo.update(bloco)
+            f.write(bloco)
+
+    chave = resumo.hexdigest()
+    extensao = os.path.splitext(img.name)[1].lower()
+    path = os.path.join(PASTA_IMAGENS, chave[:2], chave + extensao)
+    if os.path.exists(path):
+        # Conteúdo já armazenado: descarta a cópia e renova a data para a coleta não apagá-lo agora
+        os.remove(temporario)
+        os.utime(path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temporario, path)
+        gerar_variantes(path)
+    return path
+
+
+def _caminho_variante(pasta, path):
+    return os.path.join(pasta, os.path.basename(path) + ".jpg")
+
+
+def gerar_variantes(path):
+    # Gera miniatura e versão de exibição a partir de uma única decodificação do original
+    try:
+        with Image.open(path) as original:
+            imagem = ImageOps.exif_transpose(original)
+            if imagem.mode != "RGB":
+                # JPEG não tem transparência: aplica o fundo branco
+                fundo = Image.new("RGB", imagem.size, "white")
+                fundo.paste(imagem, mask=imagem.convert("RGBA").getchannel("A"))
+                imagem = fundo
+            for pasta, tamanho in ((PASTA_EXIBICAO, TAMANHO_EXIBICAO), (PASTA_MINIATURAS, TAMANHO_MINIATURA)):
+                os.makedirs(pasta, exist_ok=True)
+                imagem.thumbnail((tamanho, tamanho), Image.LANCZOS)
+                imagem.save(_caminho_variante(pasta, path), "JPEG", quality=QUALIDADE_JPEG, optimize=True)
+        return True
+    except (OSError, ValueError):
+        # Arquivo que o Pillow não consegue ler: as telas usam o original
+        return False
+
+
+def _variante(pasta, path):
+    # Caminho da versão reduzida; gerada na hora para imagens enviadas antes das miniaturas
+    variante = _caminho_variante(pasta, path)
+    if os.path.exists(variante):
+        return variante
+    if os.path.exists(path) and gerar_variantes(path):
+        return variante
+    return path
+
+
+def caminho_miniatura(path):
+    return _variante(PASTA_MINIATURAS, path)
+
+
+def caminho_exibicao(path):
+    return _variante(PASTA_EXIBICAO, path)
+
+
+def remover_imagem(path):
+    # Remove o original e as versões reduzidas
+    for caminho in (path, _caminho_variante(PASTA_MINIATURAS, path), _caminho_variante(PASTA_EXIBICAO, path)):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+def _antigo(path, limite):
+    try:
+        return os.path.getmtime(path) < limite
+    except FileNotFoundError:
+        return False
+
+
+def coletar_orfas(session, carencia=CARENCIA_SEGUNDOS):
+    # Apaga imagens sem referência há mais de `carencia` segundos, uploads que nunca chegaram a
+    # ser gravados em uma operação e temporários abandonados. Retorna quantos arquivos removeu.
+    limite = time.time() - carencia
+    limite_registro = datetime.datetime.now() - datetime.timedelta(seconds=carencia)
+    removidas = 0
+
+    orfas = session.execute(
+        select(ImagemArmazenada.caminho)
+        .where(ImagemArmazenada.referencias <= 0, ImagemArmazenada.atualizado_em < limite_registro)
+    ).scalars().all()
+    for caminho in orfas:
+        # Confere as referências de novo na remoção: a imagem pode ter voltado a ser usada
+        apagado = session.execute(
+            delete(ImagemArmazenada).where(ImagemArmazenada.caminho == caminho, ImagemArmazenada.referencias <= 0)
+        ).rowcount
+        session.commit()
+        # Um upload recente do mesmo conteúdo renova a data do arquivo; nesse caso ele fica
+        if apagado and _antigo(caminho, limite):
+            remover_imagem(caminho)
+            removidas += 1
+
+    # Arquivos do repositório sem registro: uploads de formulários que não foram salvos
+    registrados = set(session.execute(select(ImagemArmazenada.caminho)).scalars())
+    if os.path.isdir(PASTA_IMAGENS):
+        for pasta in os.listdir(PASTA_IMAGENS):
+            caminho_pasta = os.path.join(PASTA_IMAGENS, pasta)
+            if len(pasta) != 2 or not os.path.isdir(caminho_pasta):
+                continue
+            for nome in os.listdir(caminho_pasta):
+                caminho = os.path.join(caminho_pasta, nome)
+                if caminho not in registrados and _antigo(caminho, limite):
+                    remover_imagem(caminho)
+                    removidas += 1
+
+    if os.path.isdir(PASTA_TEMPORARIA):
+        for nome in os.listdir(PASTA_TEMPORARIA):
+            caminho = os.path.join(PASTA_TEMPORARIA, nome)
+            if _antigo(caminho, limite):
+                os.remove(caminho)
+    return removidas
+
+
+def iniciar_coletor(intervalo=INTERVALO_COLETA):
+    # Executa coletar_orfas periodicamente em uma thread própria
+    def executar():
+        global ultimo_erro_coleta
+        while True:
+            time.sleep(intervalo)
+            try:
+                coletar_orfas(get_session())
+            except Exception as e:
+                ultimo_erro_coleta = (datetime.datetime.now(), str(e))
+            finally:
+                fechar_session()
+
+    thread = threading.Thread(target=executar, name="coletor-imagens", daemon=True)
+    thread.start()
+    return thread
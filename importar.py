@@ -0,0 +1,344 @@
+# importar.py
+# Importação em lote de operações históricas a partir de CSV, XLSX ou JSONL.
+#
+#   python importar.py operacoes.csv
+#   python importar.py operacoes.xlsx --imagens fotos.zip --lote 5000
+#   python importar.py operacoes.jsonl --mapa "Nome=nome_operacao" --mapa "Dia=data"
+#
+# As colunas são associadas aos campos de Operacao pelo nome do campo ou pelo rótulo usado
+# nos formulários ("Edição", "Nome da Operação", "TCOs Lavrados"...). Apreensões e forças
+# aceitam uma lista JSON ou o formato "tipo: quantidade; tipo: quantidade". Imagens são
+# nomes de arquivos dentro do ZIP informado em --imagens, separados por ";".
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+import unicodedata
+import zipfile
+from collections import Counter
+from sqlalchemy import insert
+from db import (
+    get_session, fechar_session, inicializar_banco, obter_id_por_nome, inserir_visitas, separar_locais, reconstruir_resumo,
+    ajustar_referencias, Operacao, TipoApreensao, Forca, ApreensaoItem, ForcaEmpregada,
+)
+
+CAMPOS_TEXTO = ["edicao", "nome_operacao", "descricao", "locais"]
+CAMPOS_NUMERICOS = ["pessoas_abordadas", "estabelecimentos_fiscalizados", "pessoas_conduzidas", "tco", "interditados"]
+CAMPOS_OBRIGATORIOS = ["edicao", "nome_operacao", "data"]
+FORMATOS_DATA = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d"]
+
+# Rótulos dos formulários e variações comuns aceitos como nome de coluna
+ROTULOS = {
+    "edicao": "edicao",
+    "nome_da_operacao": "nome_operacao",
+    "operacao": "nome_operacao",
+    "setores": "descricao",
+    "locais_fiscalizados": "locais",
+    "estabelecimentos_fiscalizados": "estabelecimentos_fiscalizados",
+    "fiscalizados": "estabelecimentos_fiscalizados",
+    "abordados": "pessoas_abordadas",
+    "conduzidos": "pessoas_conduzidas",
+    "tcos": "tco",
+    "tcos_lavrados": "tco",
+    "estabelecimentos_interditados": "interditados",
+    "apreensoes_realizadas": "apreensoes",
+    "forcas_empregadas": "forcas",
+}
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+def _chave(nome):
+    # "Nome da Operação" -> "nome_da_operacao"
+    sem_acento = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return "_".join("".join(c if c.isalnum() else " " for c in sem_acento.lower()).split())
+
+
+def montar_mapa(colunas, mapa_manual):
+    # {coluna do arquivo: campo de Operacao}
+    campos = set(CAMPOS_TEXTO + CAMPOS_NUMERICOS + ["data", "apreensoes", "forcas", "imagens"])
+    mapa = {}
+    for coluna in colunas:
+        if coluna in mapa_manual:
+            mapa[coluna] = mapa_manual[coluna]
+            continue
+        chave = _chave(coluna)
+        campo = chave if chave in campos else ROTULOS.get(chave)
+        if campo:
+            mapa[coluna] = campo
+    faltando = [c for c in CAMPOS_OBRIGATORIOS if c not in mapa.values()]
+    if faltando:
+        raise SystemExit(f"Colunas obrigatórias não encontradas: {', '.join(faltando)}")
+    return mapa
+
+
+def ler_linhas(caminho, separador=None):
+    # Gera (número da linha, {coluna: valor}) sem carregar o arquivo inteiro. Uma linha JSONL
+    # ilegível é gerada como LinhaInvalida, para ser rejeitada sem interromper a leitura
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in (".jsonl", ".ndjson"):
+        with open(caminho, encoding="utf-8") as f:
+            for numero, linha in enumerate(f, start=1):
+                if linha.strip():
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError as e:
+                        registro = LinhaInvalida(f"JSON inválido: {e.msg}")
+                    if not isinstance(registro, (dict, LinhaInvalida)):
+                        registro = LinhaInvalida("a linha não é um objeto JSON")
+                    yield numero, registro
+    elif extensao in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise SystemExit("Para importar XLSX instale o openpyxl: pip install openpyxl")
+        planilha = load_workbook(caminho, read_only=True, data_only=True).active
+        linhas = planilha.iter_rows(values_only=True)
+        cabecalho = [str(c) if c is not None else "" for c in next(linhas)]
+        for numero, valores in enumerate(linhas, start=2):
+            if any(v is not None for v in valores):
+                yield numero, dict(zip(cabecalho, valores))
+    else:
+        with open(caminho, encoding="utf-8-sig", newline="") as f:
+            if separador is None:
+                separador = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t").delimiter
+                f.seek(0)
+            for numero, linha in enumerate(csv.DictReader(f, delimiter=separador), start=2):
+                yield numero, linha
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _data(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    texto = str(valor).strip()
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise LinhaInvalida(f"data inválida: {texto!r}")
+
+
+def _inteiro(campo, valor):
+    if _vazio(valor):
+        return 0
+    try:
+        numero = float(str(valor).strip().replace(",", "."))
+    except ValueError:
+        raise LinhaInvalida(f"{campo} não é um número: {valor!r}")
+    if numero < 0 or numero != int(numero):
+        raise LinhaInvalida(f"{campo} deve ser um inteiro não negativo: {valor!r}")
+    return int(numero)
+
+
+def _lista(campo, valor, chave_nome, chave_quantidade):
+    # Lista JSON [{chave_nome, chave_quantidade}] ou texto "nome: qtd; nome: qtd"
+    if _vazio(valor):
+        return []
+    if isinstance(valor, str) and valor.strip().startswith("["):
+        try:
+            valor = json.loads(valor)
+        except json.JSONDecodeError:
+            raise LinhaInvalida(f"{campo}: JSON inválido")
+    if isinstance(valor, list):
+        itens = []
+        for item in valor:
+            if not isinstance(item, dict):
+                raise LinhaInvalida(f"{campo}: item inválido {item!r}")
+            itens.append({chave_nome: str(item.get(chave_nome, "")).strip(), chave_quantidade: _inteiro(campo, item.get(chave_quantidade))})
+        return itens
+    itens = []
+    for parte in str(valor).split(";"):
+        if not parte.strip():
+            continue
+        nome, _, quantidade = parte.rpartition(":")
+        if not nome:
+            raise LinhaInvalida(f"{campo}: esperado 'nome: quantidade', recebido {parte.strip()!r}")
+        itens.append({chave_nome: nome.strip(), chave_quantidade: _inteiro(campo, quantidade)})
+    return itens
+
+
+def normalizar_linha(bruta, mapa):
+    # Converte uma linha do arquivo nos valores de Operacao; levanta LinhaInvalida
+    valores = {mapa[coluna]: valor for coluna, valor in bruta.items() if coluna in mapa}
+    for campo in CAMPOS_OBRIGATORIOS:
+        if _vazio(valores.get(campo)):
+            raise LinhaInvalida(f"{campo} é obrigatório")
+
+    operacao = {campo: ("" if _vazio(valores.get(campo)) else str(valores[campo]).strip()) for campo in CAMPOS_TEXTO}
+    operacao["data"] = _data(valores["data"])
+    for campo in CAMPOS_NUMERICOS:
+        operacao[campo] = _inteiro(campo, valores.get(campo))
+
+    apreensoes = _lista("apreensoes", valores.get("apreensoes"), "tipo", "quantidade")
+    forcas = _lista("forcas", valores.get("forcas"), "nome", "viaturas")
+    imagens = valores.get("imagens")
+    if _vazio(imagens):
+        imagens = []
+    elif isinstance(imagens, str):
+        if imagens.strip().startswith("["):
+            try:
+                imagens = json.loads(imagens)
+            except json.JSONDecodeError:
+                raise LinhaInvalida("imagens: JSON inválido")
+        else:
+            imagens = [n.strip() for n in imagens.split(";") if n.strip()]
+    if not isinstance(imagens, list) or not all(isinstance(nome, str) for nome in imagens):
+        raise LinhaInvalida(f"imagens: esperada uma lista de nomes de arquivo, recebido {imagens!r}")
+    return operacao, apreensoes, forcas, imagens
+
+
+class ArquivoImagens:
+    # Resolve nomes de imagens em um ZIP para caminhos do repositório de imagens
+    def __init__(self, caminho):
+        self.zip = zipfile.ZipFile(caminho)
+        self.membros = {os.path.basename(nome): nome for nome in self.zip.namelist() if not nome.endswith("/")}
+        self.salvas = {}
+
+    def caminho(self, nome):
+        from imagens import salvar_imagem
+        if nome not in self.salvas:
+            membro = self.membros.get(os.path.basename(nome))
+            if membro is None:
+                raise LinhaInvalida(f"imagem {nome!r} não encontrada no ZIP")
+            with self.zip.open(membro) as arquivo:
+                self.salvas[nome] = salvar_imagem(arquivo)
+        return self.salvas[nome]
+
+
+def inserir_lote(session, lote, caches):
+    # Insere um lote de (operacao, apreensoes, forcas, imagens) em uma única transação,
+    # com INSERTs em massa para as operações e para as tabelas normalizadas
+    linhas = []
+    for operacao, apreensoes, forcas, imagens in lote:
+        linhas.append(dict(operacao, apreensoes=json.dumps(apreensoes), forcas=json.dumps(forcas), imagens=json.dumps(imagens)))
+    ids = session.execute(
+        insert(Operacao).returning(Operacao.id, sort_by_parameter_order=True), linhas
+    ).scalars().all()
+
+    itens, empregadas, visitas, caminhos = [], [], [], Counter()
+    for op_id, (operacao, apreensoes, forcas, imagens) in zip(ids, lote):
+        for ap in apreensoes:
+            tipo_id = obter_id_por_nome(session, TipoApreensao, ap["tipo"] or "Outros", caches["tipos"])
+            itens.append({"operacao_id": op_id, "tipo_id": tipo_id, "quantidade": ap["quantidade"]})
+        for f in forcas:
+            forca_id = obter_id_por_nome(session, Forca, f["nome"] or "Desconhecido", caches["forcas"])
+            empregadas.append({"operacao_id": op_id, "forca_id": forca_id, "viaturas": f["viaturas"]})
+        visitas.append((op_id, operacao["data"], separar_locais(operacao.get("locais"))))
+        caminhos.update(imagens)
+    if itens:
+        session.execute(insert(ApreensaoItem), itens)
+    if empregadas:
+        session.execute(insert(ForcaEmpregada), empregadas)
+    inserir_visitas(session, visitas, caches["locais"])
+    if caminhos:
+        ajustar_referencias(session, list(caminhos.elements()), 1)
+    session.commit()
+    return ids
+
+
+def importar(caminho, mapa_manual=None, zip_imagens=None, tamanho_lote=5000, separador=None, estrito=False, saida=sys.stdout):
+    # Importa o arquivo e retorna um dicionário com as estatísticas da execução
+    imagens = ArquivoImagens(zip_imagens) if zip_imagens else None
+    mapa = None
+    erros = []
+
+    if estrito:
+        # Valida o arquivo inteiro antes de gravar qualquer linha
+        for numero, bruta in ler_linhas(caminho, separador):
+            if isinstance(bruta, LinhaInvalida):
+                erros.append((numero, str(bruta)))
+                continue
+            mapa = mapa or montar_mapa(bruta.keys(), mapa_manual or {})
+            try:
+                normalizar_linha(bruta, mapa)
+            except LinhaInvalida as e:
+                erros.append((numero, str(e)))
+        if erros:
+            for numero, mensagem in erros:
+                print(f"Linha {numero}: {mensagem}", file=saida)
+            raise SystemExit(f"{len(erros)} linhas inválidas; nada foi importado.")
+
+    session = get_session()
+    caches = {"tipos": {}, "forcas": {}, "locais": {}}
+    inicio = time.perf_counter()
+    lote, inseridas = [], 0
+    try:
+        for numero, bruta in ler_linhas(caminho, separador):
+            if isinstance(bruta, LinhaInvalida):
+                erros.append((numero, str(bruta)))
+                continue
+            mapa = mapa or montar_mapa(bruta.keys(), mapa_manual or {})
+            try:
+                operacao, apreensoes, forcas, nomes_imagens = normalizar_linha(bruta, mapa)
+                if nomes_imagens and imagens is None:
+                    raise LinhaInvalida("a linha tem imagens mas nenhum ZIP foi informado (--imagens)")
+                caminhos = [imagens.caminho(nome) for nome in nomes_imagens]
+            except LinhaInvalida as e:
+                erros.append((numero, str(e)))
+                continue
+            lote.append((operacao, apreensoes, forcas, caminhos))
+            if len(lote) >= tamanho_lote:
+                inseridas += len(inserir_lote(session, lote, caches))
+                lote = []
+                decorrido = time.perf_counter() - inicio
+                print(f"{inseridas} operações importadas ({inseridas / decorrido:,.0f} linhas/s)", file=saida)
+        if lote:
+            inseridas += len(inserir_lote(session, lote, caches))
+        # Os totais do Relatório Geral são recalculados uma vez, no final
+        reconstruir_resumo(session)
+    finally:
+        fechar_session()
+
+    decorrido = time.perf_counter() - inicio
+    for numero, mensagem in erros:
+        print(f"Linha {numero} ignorada: {mensagem}", file=saida)
+    return {
+        "inseridas": inseridas,
+        "ignoradas": len(erros),
+        "segundos": decorrido,
+        "linhas_por_segundo": inseridas / decorrido if decorrido else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa operações históricas de CSV, XLSX ou JSONL")
+    parser.add_argument("arquivo", help="Arquivo .csv, .xlsx ou .jsonl")
+    parser.add_argument("--imagens", help="ZIP com as imagens citadas na coluna 'imagens'")
+    parser.add_argument("--mapa", action="append", default=[], metavar="COLUNA=CAMPO",
+                        help="Associa uma coluna do arquivo a um campo de Operacao (pode repetir)")
+    parser.add_argument("--lote", type=int, default=5000, help="Linhas por transação (padrão: 5000)")
+    parser.add_argument("--separador", help="Separador do CSV (detectado automaticamente se omitido)")
+    parser.add_argument("--estrito", action="store_true", help="Não importa nada se alguma linha for inválida")
+    args = parser.parse_args()
+
+    mapa_manual = {}
+    for item in args.mapa:
+        coluna, _, campo = item.partition("=")
+        if not campo:
+            parser.error(f"--mapa deve ter o formato COLUNA=CAMPO: {item!r}")
+        if campo not in CAMPOS_TEXTO + CAMPOS_NUMERICOS + ["data", "apreensoes", "forcas", "imagens"]:
+            parser.error(f"--mapa: campo desconhecido {campo!r}")
+        mapa_manual[coluna] = campo
+
+    inicializar_banco()
+    resultado = importar(args.arquivo, mapa_manual, args.imagens, args.lote, args.separador, args.estrito)
+    print(
+        f"{resultado['inseridas']} operações importadas, {resultado['ignoradas']} linhas ignoradas, "
+        f"em {resultado['segundos']:.1f}s ({resultado['linhas_por_segundo']:,.0f} linhas/s)."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# metricas.py
+# Medição de tempo das etapas de cada execução do script (consultas SQL, JSON, pandas, gráficos,
+# PDF, imagens) e da página inteira. Os tempos da execução atual ficam disponíveis para o painel
+# de administração; os acumulados vão para histogramas exportados no formato texto do Prometheus
+# (arquivo lido pelo textfile collector do node_exporter ou servido por um endpoint).
+import datetime
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from sqlalchemy import event
+
+ARQUIVO_METRICAS = os.environ.get("GGIM_METRICAS", os.path.join("metricas", "ggim.prom"))
+INTERVALO_EXPORTACAO = 15  # segundos
+ultimo_erro_exportacao = None  # (quando, mensagem) da última gravação do arquivo que falhou; exibido no painel de desempenho
+
+# Limites dos buckets, em segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    def __init__(self):
+        self.contagens = [0] * len(BUCKETS)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, segundos):
+        for i, limite in enumerate(BUCKETS):
+            if segundos <= limite:
+                self.contagens[i] += 1
+                break
+        self.soma += segundos
+        self.total += 1
+
+
+_lock = threading.Lock()
+# {(nome da métrica, valor do rótulo): Histograma}
+_histogramas = {}
+_local = threading.local()
+
+METRICAS = {
+    "ggim_pagina_segundos": ("pagina", "Duração de cada execução do script, por página"),
+    "ggim_etapa_segundos": ("etapa", "Duração das etapas instrumentadas (SQL, JSON, pandas, gráfico, PDF, imagens)"),
+    "ggim_api_segundos": ("rota", "Duração das requisições da API (api.py), por rota"),
+}
+
+
+def _observar(metrica, rotulo, segundos):
+    with _lock:
+        histograma = _histogramas.get((metrica, rotulo))
+        if histograma is None:
+            histograma = _histogramas[(metrica, rotulo)] = Histograma()
+        histograma.observar(segundos)
+
+
+def iniciar_execucao():
+    # Começa a coleta das etapas de uma execução do script (na thread que a executa)
+    _local.etapas = {}
+
+
+def etapas_da_execucao():
+    # {etapa: (chamadas, milissegundos)} da execução atual
+    return dict(getattr(_local, "etapas", {}))
+
+
+def registrar(etapa, segundos):
+    etapas = getattr(_local, "etapas", None)
+    if etapas is not None:
+        chamadas, total = etapas.get(etapa, (0, 0.0))
+        etapas[etapa] = (chamadas + 1, total + segundos * 1000)
+    _observar("ggim_etapa_segundos", etapa, segundos)
+
+
+@contextmanager
+def medir(etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(etapa, time.perf_counter() - inicio)
+
+
+def medido(etapa, funcao):
+    # `funcao` com o tempo de cada chamada registrado em `etapa` (para callbacks, ex. download_button)
+    @wraps(funcao)
+    def executar(*args, **kwargs):
+        with medir(etapa):
+            return funcao(*args, **kwargs)
+    return executar
+
+
+@contextmanager
+def medir_pagina(pagina):
+    # Duração total da execução do script para a página (inclui st.rerun/st.stop)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        _local.pagina = (pagina, segundos * 1000)
+        _observar("ggim_pagina_segundos", pagina, segundos)
+
+
+@contextmanager
+def medir_requisicao(rota):
+    # Duração de uma requisição da API; `rota` é o modelo do caminho (ex. /operacoes/<id>)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observar("ggim_api_segundos", rota, time.perf_counter() - inicio)
+
+
+def pagina_da_execucao():
+    # (página, milissegundos) da última página medida nesta thread, ou None
+    return getattr(_local, "pagina", None)
+
+
+def instrumentar_engine(engine):
+    # Mede todas as consultas SQL do engine na etapa "sql"
+    def antes(conexao, cursor, instrucao, parametros, contexto, executemany):
+        conexao.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+    def depois(conexao, cursor, instrucao, parametros, contexto, executemany):
+        registrar("sql", time.perf_counter() - conexao.info["inicio_consulta"].pop())
+
+    def erro(contexto):
+        # Consulta que falhou: descarta o início registrado
+        if contexto.connection is not None and contexto.connection.info.get("inicio_consulta"):
+            contexto.connection.info["inicio_consulta"].pop()
+
+    event.listen(engine, "before_cursor_execute", antes)
+    event.listen(engine, "after_cursor_execute", depois)
+    event.listen(engine, "handle_error", erro)
+
+
+def resumo_paginas():
+    # {pagina: (execuções, média em ms)} acumulado desde o início do processo
+    with _lock:
+        return {
+            rotulo: (h.total, h.soma / h.total * 1000)
+            for (metrica, rotulo), h in sorted(_histogramas.items())
+            if metrica == "ggim_pagina_segundos" and h.total
+        }
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def texto_prometheus():
+    # Histogramas no formato de exposição texto do Prometheus
+    linhas = []
+    with _lock:
+        itens = sorted(_histogramas.items())
+        for metrica, (rotulo_nome, ajuda) in METRICAS.items():
+            linhas.append(f"# HELP {metrica} {ajuda}")
+            linhas.append(f"# TYPE {metrica} histogram")
+            for (nome, rotulo), h in itens:
+                if nome != metrica:
+                    continue
+                rotulo = f'{rotulo_nome}="{_escapar(rotulo)}"'
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS, h.contagens):
+                    acumulado += contagem
+                    linhas.append(f'{metrica}_bucket{{{rotulo},le="{limite}"}} {acumulado}')
+                linhas.append(f'{metrica}_bucket{{{rotulo},le="+Inf"}} {h.total}')
+                linhas.append(f"{metrica}_sum{{{rotulo}}} {h.soma:.6f}")
+                linhas.append(f"{metrica}_count{{{rotulo}}} {h.total}")
+    return "\n".join(linhas) + "\n"
+
+
+def gravar_arquivo(caminho=ARQUIVO_METRICAS):
+    # Grava em um temporário e substitui: o coletor nunca lê um arquivo pela metade
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(texto_prometheus())
+    os.replace(temporario, caminho)
+
+
+def iniciar_exportador(caminho=ARQUIVO_METRICAS, intervalo=INTERVALO_EXPORTACAO):
+    # Grava o arquivo de métricas periodicamente em uma thread própria
+    def executar():
+        global ultimo_erro_exportacao
+        while True:
+            time.sleep(intervalo)
+            try:
+                gravar_arquivo(caminho)
+            except OSError as e:
+                ultimo_erro_exportacao = (datetime.datetime.now(), str(e))
+
+    thread = threading.Thread(target=executar, name="exportador-metricas", daemon=True)
+    thread.start()
+    return thread
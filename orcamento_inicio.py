@@ -0,0 +1,116 @@
+# orcamento_inicio.py
+# Verifica o orçamento de inicialização a frio de cada página. Cada página é aberta em um processo
+# Python novo, como um worker recém-criado depois de um deploy, e são medidos:
+#   importacao_ms         importação dos módulos do sistema usados pela página, com o SQLAlchemy
+#                         e os modelos (sem o Streamlit)
+#   primeira_execucao_ms  primeira execução completa do script na página (primeira pintura)
+#   pesados               bibliotecas pesadas importadas que a página não deveria carregar
+# Termina com código 1 quando algum limite é ultrapassado; executado no CI a cada push
+# (.github/workflows/orcamento.yml).
+#
+#   python orcamento_inicio.py
+#   python orcamento_inicio.py --banco sqlite:///bench.db --tolerancia 1.5
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+PESADOS = ["pandas", "numpy", "fpdf"]
+
+# Limites por página, em ms; "proibidos" são módulos que não podem aparecer em sys.modules
+ORCAMENTO = {
+    "Login": {"importacao_ms": 500, "primeira_execucao_ms": 800, "proibidos": PESADOS},
+    "Cadastrar Operação": {"importacao_ms": 500, "primeira_execucao_ms": 1000, "proibidos": PESADOS},
+    "Visualizar Operações": {"importacao_ms": 550, "primeira_execucao_ms": 1200, "proibidos": ["pandas", "numpy"]},
+    "Análise de Dados": {"importacao_ms": 1200, "primeira_execucao_ms": 2500, "proibidos": []},
+    "Relatório Geral": {"importacao_ms": 1200, "primeira_execucao_ms": 2500, "proibidos": []},
+}
+
+# Módulos importados pelo main.py antes de qualquer página. Este arquivo não importa nenhum módulo
+# do sistema no nível do módulo: no processo novo, todos (com o SQLAlchemy) entram na medição
+MODULOS_MAIN = ["db", "imagens", "metricas", "perfil", "paginas", "paginas.comum"]
+
+
+def medir(pagina):
+    # Executado no processo novo: mede a página e devolve o resultado como dicionário
+    from streamlit.testing.v1 import AppTest  # Custo do próprio Streamlit, fora da medição
+
+    ja_importados = [modulo for modulo in MODULOS_MAIN + ["sqlalchemy"] if modulo in sys.modules]
+    if ja_importados:
+        raise RuntimeError(f"Módulos importados antes da medição: {', '.join(ja_importados)}")
+    inicio = time.perf_counter()
+    for modulo in MODULOS_MAIN:
+        importlib.import_module(modulo)
+    from paginas import PAGINAS
+    if pagina in PAGINAS:
+        importlib.import_module(PAGINAS[pagina])
+    importacao = time.perf_counter() - inicio
+
+    app = AppTest.from_file("main.py", default_timeout=120)
+    if pagina in PAGINAS:
+        app.session_state["usuario"] = "orcamento"
+        app.session_state["main_menu"] = pagina
+    inicio = time.perf_counter()
+    app.run()
+    primeira_execucao = time.perf_counter() - inicio
+    return {
+        "importacao_ms": round(importacao * 1000, 1),
+        "primeira_execucao_ms": round(primeira_execucao * 1000, 1),
+        "pesados": [modulo for modulo in PESADOS if modulo in sys.modules],
+        "erros": [str(e.value) for e in app.exception],
+    }
+
+
+def _medir_em_processo_novo(pagina, banco):
+    ambiente = dict(os.environ, GGIM_BANCO_URL=banco)
+    saida = subprocess.run(
+        [sys.executable, __file__, "--medir", pagina],
+        capture_output=True, text=True, env=ambiente, check=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def verificar(banco, tolerancia=1.0):
+    # Lista de (página, medida, violações) de todas as páginas do orçamento
+    resultados = []
+    for pagina, limites in ORCAMENTO.items():
+        medida = _medir_em_processo_novo(pagina, banco)
+        violacoes = list(medida["erros"])
+        for chave in ("importacao_ms", "primeira_execucao_ms"):
+            if medida[chave] > limites[chave] * tolerancia:
+                violacoes.append(f"{chave} {medida[chave]:.0f} > {limites[chave] * tolerancia:.0f}")
+        for modulo in set(medida["pesados"]) & set(limites["proibidos"]):
+            violacoes.append(f"importou {modulo}")
+        resultados.append((pagina, medida, violacoes))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o orçamento de inicialização a frio das páginas")
+    parser.add_argument("--banco", help="URL do banco usado nas medições (padrão: o banco do sistema)")
+    parser.add_argument("--tolerancia", type=float, default=1.0, help="Multiplicador dos limites, para máquinas mais lentas (padrão: 1.0)")
+    parser.add_argument("--medir", help=argparse.SUPPRESS)  # Uso interno: processo filho
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir), ensure_ascii=False))
+        return
+
+    import db
+    if args.banco:
+        db.DATABASE_URL = args.banco
+    # Tabelas e migrações criadas antes, para não contarem na primeira execução de cada página
+    db.inicializar_banco()
+    resultados = verificar(db.DATABASE_URL, args.tolerancia)
+    for pagina, medida, violacoes in resultados:
+        situacao = "OK" if not violacoes else "FALHOU: " + "; ".join(violacoes)
+        print(f"{pagina:22} importação {medida['importacao_ms']:7.1f} ms   primeira execução {medida['primeira_execucao_ms']:7.1f} ms   {situacao}")
+    if any(violacoes for _, _, violacoes in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
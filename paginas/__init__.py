@@ -0,0 +1,16 @@
+# paginas/
+# Páginas do sistema, uma por módulo. Cada módulo só é importado quando a página é aberta pela
+# primeira vez no processo: o login e o cadastro não pagam a importação de pandas, numpy e
+# fpdf, usados apenas pelas páginas de listagem, análise e relatórios (ver orcamento_inicio.py).
+import importlib
+
+PAGINAS = {
+    "Cadastrar Operação": "paginas.cadastro",
+    "Visualizar Operações": "paginas.operacoes",
+    "Análise de Dados": "paginas.analise",
+    "Relatório Geral": "paginas.relatorio_geral",
+}
+
+
+def exibir(nome):
+    importlib.import_module(PAGINAS[nome]).exibir()
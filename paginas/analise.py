@@ -0,0 +1,106 @@
+# paginas/analise.py
+# "Análise de Dados": gráfico agregado por período, tabela detalhada e exportação
+import datetime
+from functools import partial
+import streamlit as st
+from db import get_session
+from consultas import versao_dados, dataframe_analise, ranking_locais, ORDENS_LOCAIS
+from config import EXPORTACAO
+from exportar import exportar_bytes, comando_exportacao
+from graficos import AGRUPAMENTOS, escolher_agrupamento, agregar, media_movel, figura_estatisticas
+from metricas import medir
+from paginas.comum import fragmento, filtros_periodo
+from relatorios import formatar_data_br
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def carregar_analise(versao, inicio, fim, edicoes):
+    # Compartilhado entre execuções e sessões; `versao` (versao_dados) muda a cada gravação
+    # e invalida as entradas antigas
+    return dataframe_analise(get_session(), inicio, fim, edicoes)
+
+
+@fragmento
+def grafico_analise(df):
+    # Gráfico principal - Incluindo Total Apreensões. Agregado por período para que o
+    # número de barras/pontos enviados ao navegador não cresça com o histórico.
+    # Trocar o agrupamento ou a média móvel redesenha apenas o gráfico (sem refazer a consulta)
+    col_agrup, col_media = st.columns(2)
+    with col_agrup:
+        agrupamento = st.selectbox("Agrupamento", ["Automático"] + list(AGRUPAMENTOS), key="agrupamento_analise")
+    with col_media:
+        janela = st.selectbox("Média móvel", [0, 3, 6, 12], format_func=lambda n: f"{n} períodos" if n else "Nenhuma", key="media_movel_analise")
+    if agrupamento == "Automático":
+        agrupamento = escolher_agrupamento(df)
+        st.caption(f"Agrupamento: {agrupamento}")
+
+    with medir("grafico"):
+        serie = agregar(df, agrupamento)
+        titulo = "Estatísticas das Operações"
+        if janela:
+            serie = media_movel(serie, janela)
+            titulo += f" (média móvel de {janela} períodos)"
+        fig = figura_estatisticas(serie, agrupamento, titulo, linhas=bool(janela))
+    st.plotly_chart(fig, use_container_width=True)
+
+
+@fragmento
+def locais_analise(inicio, fim, edicoes):
+    # Ranking dos locais fiscalizados, lido do índice de locais (não depende do DataFrame acima)
+    st.subheader("📍 Locais Fiscalizados")
+    col_ordem, col_limite = st.columns(2)
+    with col_ordem:
+        ordem = st.selectbox("Ordenar por", list(ORDENS_LOCAIS), format_func=ORDENS_LOCAIS.get, key="ordem_locais")
+    with col_limite:
+        limite = st.selectbox("Locais", [10, 20, 50, 100], index=1, key="limite_locais")
+    linhas = ranking_locais(get_session(), ordem, limite, inicio, fim, edicoes)
+    if not linhas:
+        st.info("ℹ️ Nenhum local fiscalizado no período.")
+        return
+    st.dataframe([
+        {
+            "Local": linha["local"],
+            "Fiscalizações": linha["visitas"],
+            "Última fiscalização": formatar_data_br(linha["ultima_visita"]),
+            "Primeira fiscalização": formatar_data_br(linha["primeira_visita"]),
+            "Intervalo médio (dias)": linha["intervalo_medio_dias"],
+        }
+        for linha in linhas
+    ], hide_index=True)
+
+
+def exibir():
+    session = get_session()
+    st.header("📈 Análise de Dados das Operações")
+    inicio, fim, edicoes = filtros_periodo("analise")
+    with medir("dataframe"):
+        df = carregar_analise(versao_dados(session), inicio, fim, edicoes)
+
+    if not df.empty:
+        grafico_analise(df)
+
+        # Tabela com dados detalhados
+        st.subheader("Dados Completos")
+        st.dataframe(df.drop(columns=["id", "Data"]), hide_index=True)
+
+        # Exportação com os mesmos filtros; o arquivo só é gerado quando o botão é clicado.
+        # Montado em memória: acima do limite, a exportação é feita pela linha de comando
+        st.subheader("Exportar Dados")
+        formato = st.radio("Formato", ["csv", "xlsx"], format_func=str.upper, horizontal=True, key="formato_exportacao")
+        if len(df) > EXPORTACAO["limite_interface"]:
+            st.warning(
+                f"⚠️ O período selecionado tem {len(df)} operações; a exportação pela interface é limitada a "
+                f"{EXPORTACAO['limite_interface']}. Reduza o período ou exporte pela linha de comando:"
+            )
+            st.code(comando_exportacao(formato, inicio, fim, edicoes), language="bash")
+        else:
+            st.download_button(
+                "⬇️ Exportar Operações",
+                partial(exportar_bytes, formato, inicio, fim, edicoes),
+                file_name=f"operacoes_GGIM_{datetime.date.today():%Y%m%d}.{formato}",
+                on_click="ignore",
+                key="exportar_operacoes"
+            )
+        locais_analise(inicio, fim, edicoes)
+    else:
+        st.info("ℹ️ Nenhuma operação encontrada para análise.")
@@ -0,0 +1,67 @@
+# paginas/cadastro.py
+# "Cadastrar Operação"
+import datetime
+import streamlit as st
+from imagens import salvar_imagem
+from servicos import criar_operacao
+from escritor import FilaCheia
+from metricas import medir
+from paginas.comum import editor_itens
+
+
+def exibir():
+    form_key = "form_operacao_cadastro_key"
+    if "cadastro_form_submit_count" not in st.session_state:
+        st.session_state.cadastro_form_submit_count = 0
+
+    current_form_key = f"{form_key}_{st.session_state.cadastro_form_submit_count}"
+
+    editor_itens(f"cad_{current_form_key}")
+
+    with st.form("form_operacao_cadastro"):
+        st.markdown("### Informações da Operação")
+        edicao = st.text_input("Edição", key=f"edicao_cad_{current_form_key}")
+        nome_operacao = st.text_input("Nome da Operação", key=f"nome_op_cad_{current_form_key}")
+        data = st.date_input("Data", datetime.date.today(), key=f"data_cad_{current_form_key}")
+        locais = st.text_area("Locais Fiscalizados (separados por vírgula)", key=f"locais_cad_{current_form_key}")
+        descricao = st.text_area("Setores", key=f"descricao_cad_{current_form_key}")
+
+        st.markdown("### Resultados Numéricos")
+        pessoas_abordadas = st.number_input("Pessoas Abordadas", min_value=0, key=f"pessoas_abordadas_cad_{current_form_key}")
+        estabelecimentos_fiscalizados = st.number_input("Estabelecimentos Fiscalizados", min_value=0, key=f"estabelecimentos_fiscalizados_cad_{current_form_key}")
+        pessoas_conduzidas = st.number_input("Pessoas Conduzidas", min_value=0, key=f"pessoas_conduzidas_cad_{current_form_key}")
+        tco = st.number_input("TCOs Lavrados", min_value=0, key=f"tco_cad_{current_form_key}")
+        interditados = st.number_input("Estabelecimentos Interditados", min_value=0, key=f"interditados_cad_{current_form_key}")
+
+        st.markdown("---")
+        st.markdown("### Imagens")
+        imagens_upload = st.file_uploader("Imagens da Operação", accept_multiple_files=True, type=["png", "jpg", "jpeg"], key=f"imagens_cad_{current_form_key}")
+
+        submitted = st.form_submit_button("Salvar Operação")
+        if submitted:
+            # Grava os originais e gera miniatura e versão de exibição de cada um
+            with medir("imagens"):
+                imagem_paths = [salvar_imagem(img) for img in imagens_upload]
+
+            try:
+                criar_operacao({
+                    "edicao": edicao,
+                    "nome_operacao": nome_operacao,
+                    "data": data,
+                    "descricao": descricao,
+                    "pessoas_abordadas": pessoas_abordadas,
+                    "estabelecimentos_fiscalizados": estabelecimentos_fiscalizados,
+                    "pessoas_conduzidas": pessoas_conduzidas,
+                    "tco": tco,
+                    "interditados": interditados,
+                    "locais": locais,
+                }, st.session_state.apreensoes_list, st.session_state.forcas, imagem_paths)
+            except FilaCheia as e:
+                st.error(f"❌ {e}")
+            else:
+                st.success("✅ Operação cadastrada com sucesso!")
+                st.session_state.forcas.clear()
+                st.session_state.apreensoes_list.clear() # Limpa as apreensões
+
+                st.session_state.cadastro_form_submit_count += 1
+                st.rerun()
@@ -0,0 +1,122 @@
+# paginas/comum.py
+# Elementos compartilhados pelas páginas: fragmentos, filtros de período e o editor de forças
+# e apreensões
+import datetime
+import threading
+from functools import wraps
+import streamlit as st
+from db import get_session, fechar_session
+from consultas import listar_edicoes
+
+_execucao = threading.local()
+
+
+def marcar_execucao_completa(ativa):
+    # Chamado pelo main.py no início e no fim de cada execução completa do script
+    _execucao.completa = ativa
+
+
+def fragmento(funcao):
+    # st.fragment: interações com os elementos da função reexecutam apenas ela, sem recarregar
+    # a página nem refazer as consultas das outras seções. Nas reexecuções isoladas a sessão
+    # usada pelo fragmento é descartada no final (na execução completa, o main.py a descarta).
+    @st.fragment
+    @wraps(funcao)
+    def executar(*args, **kwargs):
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            if not getattr(_execucao, "completa", False):
+                fechar_session()
+    return executar
+
+
+def adicionar_forca():
+    st.session_state.forcas.append({"nome": "", "viaturas": 0})
+
+
+def remover_ultima_forca():
+    if st.session_state.forcas:
+        st.session_state.forcas.pop()
+
+
+def adicionar_apreensao(): # Nova função para adicionar apreensão
+    st.session_state.apreensoes_list.append({"tipo": "", "quantidade": 0})
+
+
+def remover_ultima_apreensao(): # Nova função para remover apreensão
+    if st.session_state.apreensoes_list:
+        st.session_state.apreensoes_list.pop()
+
+
+PERIODOS = {
+    "Todo o período": None,
+    "Últimos 30 dias": 30,
+    "Últimos 90 dias": 90,
+    "Últimos 12 meses": 365,
+    "Personalizado": None,
+}
+
+
+def filtros_periodo(prefixo):
+    # Filtros de período e edição das páginas de análise; retorna (inicio, fim, edicoes)
+    col_periodo, col_edicao = st.columns(2)
+    with col_periodo:
+        periodo = st.selectbox("Período", list(PERIODOS), key=f"periodo_{prefixo}")
+        inicio = fim = None
+        if periodo == "Personalizado":
+            intervalo = st.date_input("Intervalo", (datetime.date.today() - datetime.timedelta(days=30), datetime.date.today()), format="DD/MM/YYYY", key=f"intervalo_{prefixo}")
+            if len(intervalo) == 2:
+                inicio, fim = intervalo
+        elif PERIODOS[periodo]:
+            fim = datetime.date.today()
+            inicio = fim - datetime.timedelta(days=PERIODOS[periodo])
+    with col_edicao:
+        edicoes = st.multiselect("Edições", listar_edicoes(get_session()), key=f"edicoes_{prefixo}")
+    return inicio, fim, edicoes
+
+
+@fragmento
+def editor_itens(sufixo, rotulo=""):
+    # Forças e apreensões da operação, fora do formulário: adicionar e remover campos reexecuta
+    # apenas este trecho. Os valores ficam em st.session_state.forcas e .apreensoes_list e são
+    # gravados pelo botão de salvar do formulário.
+    st.markdown(f"### 🚓 Forças Empregadas{rotulo}")
+    col_f_btn1, col_f_btn2 = st.columns([3, 1])
+    col_f_btn1.button(f"➕ Adicionar Força{rotulo}", help="Adiciona um novo campo para Força", on_click=adicionar_forca, key=f"adicionar_forca_{sufixo}")
+    col_f_btn2.button(f"❌ Remover Última{rotulo}", help="Remove o último campo de Força", on_click=remover_ultima_forca, key=f"remover_forca_{sufixo}")
+
+    for i, forca in enumerate(st.session_state.forcas):
+        col_f1, col_f2 = st.columns([3, 1])
+        forca["nome"] = col_f1.text_input(
+            f"Nome da Força {i+1}{rotulo}",
+            value=forca.get("nome", ""),
+            key=f"nome_forca_{sufixo}_{i}"
+        )
+        forca["viaturas"] = col_f2.number_input(
+            f"Viaturas {i+1}{rotulo}",
+            min_value=0,
+            value=forca.get("viaturas", 0),
+            key=f"viaturas_forca_{sufixo}_{i}"
+        )
+    st.markdown("---")
+
+    st.markdown(f"### 📦 Apreensões Realizadas{rotulo}")
+    col_ap_btn1, col_ap_btn2 = st.columns([3, 1])
+    col_ap_btn1.button(f"➕ Adicionar Apreensão{rotulo}", help="Adiciona um novo campo para Apreensão", on_click=adicionar_apreensao, key=f"adicionar_apreensao_{sufixo}")
+    col_ap_btn2.button(f"❌ Remover Última Apreensão{rotulo}", help="Remove o último campo de Apreensão", on_click=remover_ultima_apreensao, key=f"remover_apreensao_{sufixo}")
+
+    for i, apreensao in enumerate(st.session_state.apreensoes_list):
+        col_ap_i1, col_ap_i2 = st.columns([3, 1])
+        apreensao["tipo"] = col_ap_i1.text_input(
+            f"Tipo de Apreensão {i+1} (ex: Veículos, Caixa de Som){rotulo}",
+            value=apreensao.get("tipo", ""),
+            key=f"tipo_ap_{sufixo}_{i}"
+        )
+        apreensao["quantidade"] = col_ap_i2.number_input(
+            f"Quantidade {i+1}",
+            min_value=0,
+            value=apreensao.get("quantidade", 0),
+            key=f"quantidade_ap_{sufixo}_{i}"
+        )
+    st.markdown("---")
@@ -0,0 +1,57 @@
+# paginas/desempenho.py
+# Painel de desempenho na barra lateral (apenas administradores)
+import os
+from functools import partial
+import pandas as pd
+import streamlit as st
+import imagens
+import metricas
+from metricas import etapas_da_execucao, pagina_da_execucao, resumo_paginas, ARQUIVO_METRICAS
+from perfil import MODOS as MODOS_PERFIL
+
+
+def ler_arquivo(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
+
+
+def exibir():
+    # Tempos desta execução por etapa e médias acumuladas por página (apenas administradores)
+    with st.sidebar.expander("⏱️ Desempenho"):
+        pagina = pagina_da_execucao()
+        if pagina:
+            st.markdown(f"**{pagina[0]}**: {pagina[1]:.0f} ms")
+        etapas = etapas_da_execucao()
+        if etapas:
+            st.dataframe(
+                pd.DataFrame([(etapa, chamadas, round(ms, 1)) for etapa, (chamadas, ms) in sorted(etapas.items())], columns=["Etapa", "Chamadas", "ms"]),
+                hide_index=True,
+            )
+            st.caption("O tempo de SQL também está incluído nas etapas que fazem consultas (ex.: dataframe).")
+        st.caption("Média por página desde o início do servidor")
+        st.dataframe(
+            pd.DataFrame([(nome, execucoes, round(ms, 1)) for nome, (execucoes, ms) in resumo_paginas().items()], columns=["Página", "Execuções", "Média (ms)"]),
+            hide_index=True,
+        )
+        st.caption(f"Métricas Prometheus em {ARQUIVO_METRICAS}")
+        if metricas.ultimo_erro_exportacao:
+            quando, mensagem = metricas.ultimo_erro_exportacao
+            st.warning(f"Erro ao gravar as métricas em {quando:%d/%m/%Y %H:%M}: {mensagem}")
+        if imagens.ultimo_erro_coleta:
+            quando, mensagem = imagens.ultimo_erro_coleta
+            st.warning(f"Erro na coleta de imagens em {quando:%d/%m/%Y %H:%M}: {mensagem}")
+
+        # Perfil da próxima execução desta página: o clique já dispara a execução perfilada
+        modo = st.selectbox("Perfilador", list(MODOS_PERFIL), format_func=MODOS_PERFIL.get, key="modo_perfil")
+        st.button("🔬 Perfilar próxima execução", key="perfilar", on_click=lambda: st.session_state.update(perfil_pendente=modo))
+        perfil_salvo = st.session_state.get("perfil_salvo")
+        if perfil_salvo and "arquivo" in perfil_salvo:
+            meta = perfil_salvo["metadados"]
+            st.caption(f"Último perfil: {meta['pagina']} em {meta['duracao_ms']:.0f} ms ({meta['operacoes']} operações)")
+            st.download_button(
+                "⬇️ Baixar perfil",
+                partial(ler_arquivo, perfil_salvo["arquivo"]),
+                file_name=os.path.basename(perfil_salvo["arquivo"]),
+                on_click="ignore",
+                key="baixar_perfil",
+            )
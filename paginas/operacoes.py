@@ -0,0 +1,369 @@
+# paginas/operacoes.py
+# "Visualizar Operações": listagem paginada, busca, detalhes, edição, exclusão e relatórios em lote
+import datetime
+import io
+import json
+import os
+import streamlit as st
+from db import get_session, busca_disponivel, Operacao
+from imagens import salvar_imagem, caminho_miniatura, caminho_exibicao
+from consultas import buscar_operacoes, listar_cabecalhos
+from servicos import atualizar_operacao, excluir_operacao, pdf_operacao, ConflitoEdicao
+from escritor import FilaCheia
+from pdf_lote import listar_operacoes, gerar_zip, gerar_consolidado
+from relatorios import formatar_data_br
+from metricas import medir
+from paginas.comum import fragmento, filtros_periodo, editor_itens
+
+
+def reiniciar_paginacao():
+    st.session_state.cursores_pagina = []
+
+
+def exibir_imagem(op_id, indice, img_path, legenda):
+    # Miniatura por padrão; versão de exibição e original apenas quando solicitados.
+    # Chaves por (operação, posição): o armazenamento por conteúdo dá o mesmo caminho a fotos
+    # iguais, que podem aparecer mais de uma vez na mesma operação ou em operações diferentes
+    chave = (op_id, indice)
+    if chave not in st.session_state.imagens_ampliadas:
+        with medir("imagens"):
+            miniatura = caminho_miniatura(img_path)
+        st.image(miniatura, width=250, caption=legenda)
+        # Callbacks em vez de st.rerun(): o clique reexecuta apenas o fragmento da operação
+        st.button("🔍 Ampliar", key=f"ampliar_{op_id}_{indice}", on_click=st.session_state.imagens_ampliadas.add, args=(chave,))
+        return
+
+    with medir("imagens"):
+        exibicao = caminho_exibicao(img_path)
+    st.image(exibicao, caption=legenda)
+    col_img1, col_img2 = st.columns(2)
+    with col_img1:
+        st.button("↩️ Reduzir", key=f"reduzir_{op_id}_{indice}", on_click=st.session_state.imagens_ampliadas.discard, args=(chave,))
+    with col_img2:
+        with medir("imagens"), open(img_path, "rb") as f:
+            original = f.read()
+        st.download_button("⬇️ Baixar original", original, file_name=os.path.basename(img_path), key=f"original_{op_id}_{indice}")
+
+
+def exibir_operacao(op):
+    # Detalhes completos de uma operação (carregados apenas para as operações abertas na listagem).
+    # Chamada dentro do fragmento de cada operação (item_operacao)
+    st.markdown(f"🚨 **{op.edicao}** – **{op.nome_operacao}**")
+    st.markdown(f"📅 Data: {formatar_data_br(op.data)}")
+    st.markdown("---")
+
+    # Forças Empregadas
+    if op.forcas:
+        try:
+            with medir("json"):
+                forcas = json.loads(op.forcas)
+            displayed_forcas = [f for f in forcas if f.get('viaturas', 0) > 0]
+            if displayed_forcas:
+                st.markdown("👮‍♂️👷‍♂️🚒🚓 **Forças Empregadas:**")
+                for f in displayed_forcas:
+                    st.markdown(f"• 🚔 {f['viaturas']} viatura(s) da {f['nome']}")
+            else:
+                pass # Não exibe a seção se não houver viaturas > 0
+        except json.JSONDecodeError:
+            st.warning("Dados de forças com formato inválido.")
+    st.markdown("---")
+
+
+    # Apreensões Realizadas
+    if op.apreensoes:
+        try:
+            with medir("json"):
+                apreensoes_data = json.loads(op.apreensoes)
+            displayed_apreensoes = [ap for ap in apreensoes_data if ap.get('quantidade', 0) > 0]
+            if displayed_apreensoes:
+                st.markdown("🚨 **Apreensões Realizadas:**")
+                for ap in displayed_apreensoes:
+                    st.markdown(f"• 🚨 {ap.get('quantidade', 0)} {ap.get('tipo', 'item(s)')}") # Alterado para 🚨
+            else:
+                pass # Não exibe a seção se não houver apreensões > 0
+        except json.JSONDecodeError:
+            st.warning("Dados de apreensões com formato inválido.")
+    st.markdown("---")
+
+
+    # Resultados da Operação
+    has_results = False
+    st.markdown("🔍 **Resultados da Operação:**")
+    if op.pessoas_abordadas > 0:
+        st.markdown(f"• 👥 {op.pessoas_abordadas} pessoas abordadas e devidamente qualificadas")
+        has_results = True
+    if op.estabelecimentos_fiscalizados > 0:
+        st.markdown(f"• 🏪 {op.estabelecimentos_fiscalizados} estabelecimentos fiscalizados")
+        has_results = True
+    if op.pessoas_conduzidas > 0:
+        st.markdown(f"• 🚓 {op.pessoas_conduzidas} pessoas conduzidas")
+        has_results = True
+    if op.tco > 0:
+        st.markdown(f"• 📄 {op.tco} TCOs lavrados")
+        has_results = True
+    if op.interditados > 0:
+        st.markdown(f"• 🔒 {op.interditados} estabelecimentos interditados")
+        has_results = True
+    
+    if not has_results:
+        st.info("Nenhum resultado numérico registrado.")
+    st.markdown("---")
+
+    # Locais Fiscalizados
+    if op.locais:
+        st.markdown("📍 **Locais Fiscalizados:**")
+        st.markdown(op.locais)
+        st.markdown("---")
+    
+    # Setores
+    if op.descricao:
+        st.markdown("🗺️ **Setores:**")
+        st.markdown(op.descricao)
+        st.markdown("---")
+
+
+    st.markdown("### 🖼️ Imagens Anexadas:")
+    if op.imagens:
+        try:
+            with medir("json"):
+                img_paths = json.loads(op.imagens)
+            if img_paths:
+                for i, img_path in enumerate(img_paths, start=1):
+                    if os.path.exists(img_path):
+                        exibir_imagem(op.id, i, img_path, f"Imagem {i}")
+                    else:
+                        st.warning(f"Imagem não encontrada: Imagem {i}")
+            else:
+                st.info("Nenhuma imagem anexada.")
+        except json.JSONDecodeError:
+            st.error("Erro ao carregar imagens. Formato inválido.")
+    else:
+        st.info("Nenhuma imagem anexada.")
+
+    col_actions1, col_actions2 = st.columns(2)
+    with col_actions1:
+        if st.button("✏️ Editar", key=f"edit_op_{op.id}"):
+            st.session_state.edit_op_id = op.id
+            # Versão aberta para edição: a gravação falha se outra pessoa salvar antes
+            st.session_state.edit_op_versao = op.versao
+            # Forças e apreensões atuais, editadas em st.session_state até salvar ou cancelar
+            st.session_state.forcas = json.loads(op.forcas) if op.forcas else []
+            st.session_state.apreensoes_list = json.loads(op.apreensoes) if op.apreensoes else []
+            st.rerun()
+    with col_actions2:
+        if st.button("🗑️ Excluir", key=f"delete_op_{op.id}"):
+            st.session_state.delete_op_id = op.id
+            st.rerun()
+
+    # O PDF só é gerado quando solicitado; depois vem do cache até a operação mudar
+    if op.id in st.session_state.pdfs_solicitados:
+        with medir("pdf"):
+            dados_pdf = pdf_operacao(op)
+        st.download_button(
+            "📄 Baixar Relatório em PDF",
+            dados_pdf,
+            file_name=f"relatorio_{op.edicao}.pdf",
+            mime="application/pdf",
+            key=f"download_pdf_{op.id}"
+        )
+    else:
+        st.button("📄 Gerar Relatório em PDF", key=f"gerar_pdf_{op.id}", on_click=st.session_state.pdfs_solicitados.add, args=(op.id,))
+
+
+def exibir_busca(termos):
+    # Resultados da busca textual, por relevância, com os termos destacados
+    resultados = buscar_operacoes(get_session(), termos)
+    if not resultados:
+        st.info("ℹ️ Nenhuma operação encontrada para a busca.")
+        return
+    st.caption(f"{len(resultados)} operação(ões) encontrada(s)")
+    for res in resultados:
+        item_operacao(res.id, f"📌 {res.edicao} - {res.nome} ({formatar_data_br(res.data)})", res.trecho, "abrir_busca")
+
+
+@fragmento
+def item_operacao(op_id, titulo, trecho=None, prefixo="abrir_op"):
+    # Uma operação da listagem ou da busca: abrir os detalhes, ampliar imagens e gerar o PDF
+    # reexecutam apenas este item
+    aberta = op_id in st.session_state.ops_abertas
+    with st.expander(titulo, expanded=aberta):
+        if trecho:
+            st.markdown(trecho)
+        if aberta:
+            op = get_session().get(Operacao, op_id)
+            if op:
+                exibir_operacao(op)
+        else:
+            st.button("🔍 Ver detalhes", key=f"{prefixo}_{op_id}", on_click=st.session_state.ops_abertas.add, args=(op_id,))
+
+
+@fragmento
+def relatorios_em_lote():
+    # Relatórios de todas as operações de um período/edição, em ZIP ou em um PDF consolidado
+    with st.expander("📦 Relatórios em Lote"):
+        inicio, fim, edicoes = filtros_periodo("lote")
+        formato = st.radio("Formato", ["zip", "pdf"], format_func=lambda f: "ZIP (um PDF por operação)" if f == "zip" else "PDF único com sumário", horizontal=True, key="formato_lote")
+        if st.button("Gerar Relatórios", key="gerar_lote"):
+            operacoes = listar_operacoes(get_session(), inicio, fim, edicoes)
+            if not operacoes:
+                st.warning("Nenhuma operação encontrada para os filtros selecionados.")
+            else:
+                barra = st.progress(0.0, text="Gerando relatórios...")
+                progresso = lambda concluidos, total: barra.progress(concluidos / total, text=f"{concluidos}/{total} relatórios")
+                destino = io.BytesIO()
+                with medir("pdf"):
+                    if formato == "zip":
+                        gerar_zip(operacoes, destino, progresso=progresso)
+                    else:
+                        gerar_consolidado(operacoes, destino, progresso)
+                st.session_state.lote_pdf = (f"relatorios_GGIM_{datetime.date.today():%Y%m%d}.{formato}", destino.getvalue())
+                barra.empty()
+        if st.session_state.lote_pdf:
+            nome, dados = st.session_state.lote_pdf
+            st.download_button(f"⬇️ Baixar {nome}", dados, file_name=nome, on_click="ignore", key="baixar_lote")
+
+
+def exibir():
+    session = get_session()
+    st.header("📋 Operações Cadastradas")
+
+    # Lógica de exclusão
+    if st.session_state.delete_op_id:
+        op_to_delete = session.query(Operacao).get(st.session_state.delete_op_id)
+        if op_to_delete:
+            st.warning(f"Tem certeza que deseja excluir a operação '{op_to_delete.nome_operacao}' da edição '{op_to_delete.edicao}'?")
+            col_del1, col_del2 = st.columns(2)
+            with col_del1:
+                if st.button("Confirmar Exclusão", key="confirm_delete"):
+                    try:
+                        excluir_operacao(op_to_delete.id)
+                    except (ConflitoEdicao, FilaCheia) as e:
+                        st.error(f"❌ {e}")
+                    else:
+                        st.session_state.ops_abertas.discard(st.session_state.delete_op_id)
+                        st.success("✅ Operação excluída com sucesso!")
+                        st.session_state.delete_op_id = None
+                        st.rerun()
+            with col_del2:
+                if st.button("Cancelar", key="cancel_delete"):
+                    st.session_state.delete_op_id = None
+                    st.rerun()
+        else:
+            st.session_state.delete_op_id = None
+
+    # Lógica de edição
+    if st.session_state.edit_op_id:
+        op_to_edit = session.query(Operacao).get(st.session_state.edit_op_id)
+        if op_to_edit:
+            st.subheader(f"✏️ Editando Operação: {op_to_edit.edicao} - {op_to_edit.nome_operacao}")
+
+            # Forças e apreensões carregadas em st.session_state ao clicar em "Editar"
+            editor_itens("edit", " (Edição)")
+
+            with st.form("form_operacao_edicao"):
+                st.markdown("### Informações da Operação (Edição)")
+                new_edicao = st.text_input("Edição", value=op_to_edit.edicao, key="edicao_edit")
+                new_nome_operacao = st.text_input("Nome da Operação", value=op_to_edit.nome_operacao, key="nome_op_edit")
+                new_data = st.date_input("Data", value=op_to_edit.data, key="data_edit")
+                new_locais = st.text_area("Locais Fiscalizados (separados por vírgula)", value=op_to_edit.locais, key="locais_edit")
+                new_descricao = st.text_area("Descrição", value=op_to_edit.descricao, key="descricao_edit")
+
+                st.markdown("### Resultados Numéricos (Edição)")
+                new_pessoas_abordadas = st.number_input("Pessoas Abordadas", min_value=0, value=op_to_edit.pessoas_abordadas, key="pessoas_abordadas_edit")
+                new_estabelecimentos_fiscalizados = st.number_input("Estabelecimentos Fiscalizados", min_value=0, value=op_to_edit.estabelecimentos_fiscalizados, key="estabelecimentos_fiscalizados_edit")
+                new_pessoas_conduzidas = st.number_input("Pessoas Conduzidas", min_value=0, value=op_to_edit.pessoas_conduzidas, key="pessoas_conduzidas_edit")
+                new_tco = st.number_input("TCOs Lavrados", min_value=0, value=op_to_edit.tco, key="tco_edit")
+                new_interditados = st.number_input("Estabelecimentos Interditados", min_value=0, value=op_to_edit.interditados, key="interditados_edit")
+
+                st.markdown("---")
+                st.markdown("#### Imagens Atuais:")
+                if op_to_edit.imagens:
+                    current_images = json.loads(op_to_edit.imagens)
+                    if current_images:
+                        for i, img_path in enumerate(current_images, start=1):
+                            if os.path.exists(img_path):
+                                st.image(caminho_miniatura(img_path), width=200, caption=f"Imagem {i}")
+                            else:
+                                st.warning(f"Imagem não encontrada: Imagem {i}")
+                    else:
+                        st.info("Nenhuma imagem anexada atualmente.")
+                else:
+                    st.info("Nenhuma imagem anexada atualmente.")
+
+                new_imagens_upload = st.file_uploader("Upload de Novas Imagens (substituirá as atuais)", accept_multiple_files=True, type=["png", "jpg", "jpeg"], key="imagens_edit")
+
+                col_save_edit1, col_save_edit2 = st.columns(2)
+                with col_save_edit1:
+                    save_edited = st.form_submit_button("Salvar Edição")
+                with col_save_edit2:
+                    cancel_edited = st.form_submit_button("Cancelar Edição")
+
+                if save_edited:
+                    # Novas imagens substituem as atuais; sem upload as atuais são mantidas
+                    imagem_paths = None
+                    if new_imagens_upload:
+                        with medir("imagens"):
+                            imagem_paths = [salvar_imagem(img) for img in new_imagens_upload]
+                    try:
+                        atualizar_operacao(op_to_edit.id, st.session_state.edit_op_versao, {
+                            "edicao": new_edicao,
+                            "nome_operacao": new_nome_operacao,
+                            "data": new_data,
+                            "descricao": new_descricao,
+                            "pessoas_abordadas": new_pessoas_abordadas,
+                            "estabelecimentos_fiscalizados": new_estabelecimentos_fiscalizados,
+                            "pessoas_conduzidas": new_pessoas_conduzidas,
+                            "tco": new_tco,
+                            "interditados": new_interditados,
+                            "locais": new_locais,
+                        }, st.session_state.apreensoes_list, st.session_state.forcas, imagem_paths)
+                    except (ConflitoEdicao, FilaCheia) as e:
+                        st.error(f"❌ {e}")
+                    else:
+                        st.success("✅ Operação atualizada com sucesso!")
+                        st.session_state.edit_op_id = None
+                        st.session_state.forcas.clear()
+                        st.session_state.apreensoes_list.clear() # Limpa as apreensões
+                        st.rerun()
+                elif cancel_edited:
+                    st.session_state.edit_op_id = None
+                    st.session_state.forcas.clear()
+                    st.session_state.apreensoes_list.clear() # Limpa as apreensões
+                    st.rerun()
+        else:
+            st.session_state.edit_op_id = None
+
+    # Exibe as operações (se não estiver em modo de edição/exclusão)
+    if not st.session_state.edit_op_id and not st.session_state.delete_op_id:
+        termos = st.text_input("🔎 Buscar por nome, locais ou setores", key="busca_operacoes") if busca_disponivel(session.get_bind()) else ""
+        if termos.strip():
+            exibir_busca(termos)
+        else:
+            tamanho_pagina = st.selectbox("Operações por página", [10, 25, 50, 100], key="tamanho_pagina", on_change=reiniciar_paginacao)
+            # Paginação por chave (data, id): cada página parte do último item da anterior
+            apos = st.session_state.cursores_pagina[-1] if st.session_state.cursores_pagina else None
+            cabecalhos, tem_proxima = listar_cabecalhos(session, tamanho_pagina, apos)
+            if cabecalhos:
+                for cab in cabecalhos:
+                    item_operacao(cab.id, f"📌 {cab.edicao} - {cab.nome_operacao} ({formatar_data_br(cab.data)})")
+
+                col_pag1, col_pag2, col_pag3 = st.columns([1, 2, 1])
+                with col_pag1:
+                    if st.button("⬅️ Anterior", key="pagina_anterior", disabled=not st.session_state.cursores_pagina):
+                        st.session_state.cursores_pagina.pop()
+                        st.rerun()
+                with col_pag2:
+                    st.markdown(f"Página {len(st.session_state.cursores_pagina) + 1}")
+                with col_pag3:
+                    if st.button("Próxima ➡️", key="proxima_pagina", disabled=not tem_proxima):
+                        ultimo = cabecalhos[-1]
+                        st.session_state.cursores_pagina.append((ultimo.data, ultimo.id))
+                        st.rerun()
+            elif st.session_state.cursores_pagina:
+                # A página atual ficou vazia (ex.: exclusões); volta ao início
+                reiniciar_paginacao()
+                st.rerun()
+            else:
+                st.info("ℹ️ Nenhuma operação cadastrada ainda.")
+
+        relatorios_em_lote()
@@ -0,0 +1,65 @@
+# paginas/relatorio_geral.py
+# "Relatório Geral": totais consolidados e PDF
+import datetime
+from functools import partial
+import pandas as pd
+import streamlit as st
+from db import get_session
+from servicos import totais
+from relatorios import gerar_relatorio_geral_pdf
+from metricas import medido
+from paginas.comum import filtros_periodo
+
+
+def exibir():
+    session = get_session()
+    st.header("📈 Relatório Geral de Todas as Operações")
+
+    inicio, fim, edicoes = filtros_periodo("relatorio")
+    # Sem filtros os totais vêm do resumo materializado; com filtros são agregados no banco
+    total_data = totais(session, inicio, fim, edicoes)
+
+    if not total_data or not total_data["operacoes"]:
+        st.info("Nenhuma operação encontrada para gerar um relatório geral.")
+        return
+
+    total_pessoas_abordadas = total_data["pessoas_abordadas"]
+    total_estabelecimentos_fiscalizados = total_data["estabelecimentos_fiscalizados"]
+    total_pessoas_conduzidas = total_data["pessoas_conduzidas"]
+    total_tco = total_data["tco"]
+    total_interditados = total_data["interditados"]
+    total_apreensoes = total_data["total_apreensoes"]
+    total_viaturas_empregadas = total_data["total_viaturas_empregadas"]
+    detalhes_apreensoes = total_data["detalhes_apreensoes"]
+    detalhes_forcas = total_data["detalhes_forcas"]
+
+    st.subheader("Resultados Consolidados de Todas as Operações:")
+    st.metric(label="Total de Pessoas Abordadas", value=total_pessoas_abordadas)
+    st.metric(label="Total de Estabelecimentos Fiscalizados", value=total_estabelecimentos_fiscalizados)
+    st.metric(label="Total de Pessoas Conduzidas", value=total_pessoas_conduzidas)
+    st.metric(label="Total de TCOs Lavrados", value=total_tco)
+    st.metric(label="Total de Estabelecimentos Interditados", value=total_interditados)
+    st.metric(label="Total Geral de Apreensões", value=total_apreensoes)
+    st.metric(label="Total de Viaturas Empregadas", value=total_viaturas_empregadas)
+
+    if detalhes_apreensoes:
+        st.subheader("Detalhes de Apreensões por Tipo:")
+        df_apreensoes_detalhe = pd.DataFrame(list(detalhes_apreensoes.items()), columns=['Tipo de Apreensão', 'Quantidade'])
+        st.dataframe(df_apreensoes_detalhe, hide_index=True)
+
+    if detalhes_forcas:
+        st.subheader("Detalhes de Viaturas por Força Empregada:")
+        df_forcas_detalhe = pd.DataFrame(list(detalhes_forcas.items()), columns=['Força', 'Total de Viaturas'])
+        st.dataframe(df_forcas_detalhe, hide_index=True)
+
+
+    # Botão para gerar e baixar o PDF do relatório geral
+    # Gerado em memória apenas quando o botão é clicado
+    st.download_button(
+        "📄 Baixar Relatório Geral em PDF",
+        medido("pdf", partial(gerar_relatorio_geral_pdf, total_data)),
+        file_name=f"relatorio_geral_GGIM_{datetime.datetime.now():%Y%m%d_%H%M%S}.pdf",
+        mime="application/pdf",
+        on_click="ignore",
+        key="download_general_pdf"
+    )
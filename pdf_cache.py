@@ -0,0 +1,103 @@
+# pdf_cache.py
+# Cache em disco dos relatórios PDF por operação.
+# Cada arquivo é identificado pelo id da operação e por um hash do conteúdo dos
+# seus campos, então uma operação editada nunca reaproveita um PDF antigo.
+# O tamanho total é limitado e os arquivos menos usados recentemente são removidos.
+import hashlib
+import json
+import os
+import threading
+
+CACHE_DIR = "cache_pdf"
+TAMANHO_MAXIMO_BYTES = 200 * 1024 * 1024  # 200 MB
+
+_lock = threading.Lock()
+
+
+def hash_operacao(op):
+    # Hash estável de todos os campos persistidos da operação
+    campos = {c.name: getattr(op, c.name) for c in op.__table__.columns}
+    conteudo = json.dumps(campos, sort_keys=True, default=str)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _caminho(op_id, chave):
+    return os.path.join(CACHE_DIR, f"{op_id}_{chave}.pdf")
+
+
+def ler_pdf(op):
+    # Bytes do PDF em cache para o conteúdo atual da operação, ou None
+    caminho = _caminho(op.id, hash_operacao(op))
+    with _lock:
+        if not os.path.exists(caminho):
+            return None
+        os.utime(caminho)  # Marca como usado recentemente (LRU)
+        with open(caminho, "rb") as f:
+            return f.read()
+
+
+def armazenar_pdf(op, dados):
+    # Grava os bytes do PDF em um temporário e o publica com os.replace (leitores nunca veem arquivo pela metade)
+    caminho = _caminho(op.id, hash_operacao(op))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(dados)
+    with _lock:
+        _remover_versoes(op.id)
+        os.replace(temporario, caminho)
+        _aplicar_limite()
+
+
+def obter_pdf(op, gerar):
+    # Retorna os bytes do PDF da operação, gerando-o com `gerar(op)` apenas em caso de falta no cache
+    dados = ler_pdf(op)
+    if dados is None:
+        # Gera fora do lock para não bloquear outras sessões durante o FPDF
+        dados = gerar(op)
+        armazenar_pdf(op, dados)
+    return dados
+
+
+def invalidar(op_id):
+    # Remove todos os PDFs em cache da operação (usado na edição e exclusão)
+    with _lock:
+        _remover_versoes(op_id)
+
+
+def _remover_versoes(op_id):
+    if not os.path.isdir(CACHE_DIR):
+        return
+    prefixo = f"{op_id}_"
+    for nome in os.listdir(CACHE_DIR):
+        if nome.startswith(prefixo) and nome.endswith(".pdf"):
+            try:
+                os.remove(os.path.join(CACHE_DIR, nome))
+            except FileNotFoundError:
+                pass
+
+
+def _aplicar_limite():
+    # Remove os arquivos menos usados até o cache caber no limite de tamanho
+    arquivos = []
+    total = 0
+    for nome in os.listdir(CACHE_DIR):
+        if not nome.endswith(".pdf"):
+            continue  # Ignora arquivos temporários ainda em geração
+        caminho = os.path.join(CACHE_DIR, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        arquivos.append((info.st_mtime, info.st_size, caminho))
+        total += info.st_size
+
+    arquivos.sort()
+    for _, tamanho, caminho in arquivos:
+        if total <= TAMANHO_MAXIMO_BYTES:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
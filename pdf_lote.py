@@ -0,0 +1,165 @@
+# pdf_lote.py
+# Geração em lote dos relatórios PDF das operações de um período e/ou edição, em um pool de
+# processos. O resultado é um ZIP com um PDF por operação ou um único PDF consolidado com sumário.
+#
+#   python pdf_lote.py --inicio 2024-05-01 --fim 2024-05-31 --saida maio.zip
+#   python pdf_lote.py --edicao "10ª" --formato pdf --saida edicao10.pdf --processos 8
+import argparse
+import datetime
+import math
+import multiprocessing
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import SimpleNamespace
+import pdf_cache
+from consultas import filtrar_operacoes
+from db import get_session, fechar_session, inicializar_banco, Operacao
+from relatorios import PDF, gerar_pdf, desenhar_operacao, formatar_data_br, para_bytes
+
+MINIMO_PARALELO = 4  # Abaixo disso o custo de iniciar os processos não compensa
+LINHAS_SUMARIO = 20
+
+
+def listar_operacoes(session, inicio=None, fim=None, edicoes=None):
+    return filtrar_operacoes(session.query(Operacao), inicio, fim, edicoes).order_by(Operacao.data, Operacao.id).all()
+
+
+def _campos(op):
+    return {coluna.name: getattr(op, coluna.name) for coluna in Operacao.__table__.columns}
+
+
+def _renderizar(campos):
+    # Executado nos processos do pool: recebe os campos da operação e devolve (id, bytes do PDF)
+    op = SimpleNamespace(**campos)
+    return op.id, gerar_pdf(op)
+
+
+def renderizar_pdfs(operacoes, processos=None, progresso=None):
+    # {id: bytes} dos PDFs das operações. O que já está no cache é reaproveitado; o restante é
+    # gerado em paralelo e guardado no cache. `progresso(concluidos, total)` é chamado a cada PDF.
+    pdfs = {}
+    faltando = []
+    for op in operacoes:
+        dados = pdf_cache.ler_pdf(op)
+        if dados is None:
+            faltando.append(op)
+        else:
+            pdfs[op.id] = dados
+    total = len(operacoes)
+    if progresso:
+        progresso(len(pdfs), total)
+
+    por_id = {op.id: op for op in faltando}
+
+    def concluir(op_id, dados):
+        pdfs[op_id] = dados
+        pdf_cache.armazenar_pdf(por_id[op_id], dados)
+        if progresso:
+            progresso(len(pdfs), total)
+
+    if len(faltando) < MINIMO_PARALELO:
+        for op in faltando:
+            concluir(*_renderizar(_campos(op)))
+        return pdfs
+
+    # "spawn": os processos não herdam as threads e conexões do servidor
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+        futuros = [pool.submit(_renderizar, _campos(op)) for op in faltando]
+        for futuro in as_completed(futuros):
+            concluir(*futuro.result())
+    return pdfs
+
+
+def _nome_arquivo(op):
+    edicao = re.sub(r"[^\w-]+", "_", op.edicao or "").strip("_")
+    data = op.data.strftime("%Y%m%d") if op.data else "sem_data"
+    return f"{data}_{op.id}_{edicao}.pdf"
+
+
+def gerar_zip(operacoes, destino, processos=None, progresso=None):
+    # ZIP com um PDF por operação; `destino` é um caminho ou arquivo binário
+    pdfs = renderizar_pdfs(operacoes, processos, progresso)
+    # Sem compressão: o conteúdo dos PDFs já é comprimido
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as arquivo:
+        for op in operacoes:
+            arquivo.writestr(_nome_arquivo(op), pdfs[op.id])
+
+
+def gerar_consolidado(operacoes, destino, progresso=None):
+    # Um único PDF com sumário (com links) seguido das operações. É montado em um só processo:
+    # o FPDF não junta documentos gerados separadamente.
+    pdf = PDF()
+    pdf.alias_nb_pages()
+    paginas_sumario = max(1, math.ceil(len(operacoes) / LINHAS_SUMARIO))
+    for _ in range(paginas_sumario):
+        pdf.add_page()  # Reservadas; preenchidas depois que as páginas de cada operação são conhecidas
+
+    entradas = []
+    for i, op in enumerate(operacoes, start=1):
+        pdf.add_page()
+        link = pdf.add_link()
+        pdf.set_link(link, page=pdf.page_no())
+        entradas.append((op, pdf.page_no(), link))
+        desenhar_operacao(pdf, op)
+        if progresso:
+            progresso(i, len(operacoes))
+
+    ultima_pagina = pdf.page
+    pdf.set_auto_page_break(False)
+    largura = pdf.w - pdf.l_margin - pdf.r_margin
+    for n, (op, pagina, link) in enumerate(entradas):
+        if n % LINHAS_SUMARIO == 0:
+            pdf.page = 1 + n // LINHAS_SUMARIO
+            pdf.font_family = ""  # Força a seleção da fonte no conteúdo da página reaberta
+            pdf.set_xy(pdf.l_margin, 55)
+            pdf.set_font("Arial", 'B', 14)
+            pdf.cell(0, 10, "Sumário", ln=True, align="C")
+            pdf.ln(2)
+            pdf.set_font("Arial", '', 11)
+        titulo = f"{formatar_data_br(op.data)} - {op.edicao} - {op.nome_operacao}"
+        pdf.cell(largura - 20, 8, txt=titulo[:80], border="B", link=link)
+        pdf.cell(20, 8, txt=str(pagina), border="B", ln=True, align="R", link=link)
+    pdf.page = ultima_pagina
+    pdf.set_auto_page_break(True, margin=15)
+
+    if isinstance(destino, str):
+        with open(destino, "wb") as f:
+            f.write(para_bytes(pdf))
+    else:
+        destino.write(para_bytes(pdf))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera em lote os relatórios PDF das operações")
+    parser.add_argument("--inicio", type=datetime.date.fromisoformat, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=datetime.date.fromisoformat, help="Data final (AAAA-MM-DD)")
+    parser.add_argument("--edicao", action="append", default=[], help="Edição (pode repetir)")
+    parser.add_argument("--formato", choices=["zip", "pdf"], default="zip", help="ZIP com um PDF por operação ou PDF único consolidado")
+    parser.add_argument("--saida", required=True, help="Arquivo de saída")
+    parser.add_argument("--processos", type=int, default=None, help="Processos no pool (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    def progresso(concluidos, total):
+        print(f"\r{concluidos}/{total} relatórios", end="", file=sys.stderr, flush=True)
+
+    inicializar_banco()
+    inicio = datetime.datetime.now()
+    try:
+        operacoes = listar_operacoes(get_session(), args.inicio, args.fim, args.edicao)
+        if not operacoes:
+            raise SystemExit("Nenhuma operação encontrada.")
+        if args.formato == "pdf":
+            gerar_consolidado(operacoes, args.saida, progresso)
+        else:
+            gerar_zip(operacoes, args.saida, args.processos, progresso)
+    finally:
+        fechar_session()
+    segundos = (datetime.datetime.now() - inicio).total_seconds()
+    print(f"\n{len(operacoes)} relatórios gravados em {args.saida} em {segundos:.1f}s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# perfil.py
+# Captura de perfil de uma única execução do script, acionada pelo painel de desempenho.
+#   "amostragem":    amostra a pilha da thread do script a cada INTERVALO_AMOSTRAGEM e grava um
+#                    JSON do speedscope (https://www.speedscope.app), com flame graph. Overhead baixo.
+#   "deterministico": cProfile; grava um .pstats (snakeviz, gprof2dot, pstats). Conta todas as
+#                    chamadas, mas deixa a execução mais lenta.
+# Cada perfil vem acompanhado de um <nome>.meta.json com página, usuário, número de operações etc.
+import cProfile
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+PASTA_PERFIS = "perfis"
+INTERVALO_AMOSTRAGEM = 0.005  # segundos
+MODOS = {"amostragem": "Amostragem (speedscope)", "deterministico": "Determinístico (cProfile)"}
+
+
+class Amostrador:
+    # Amostrador de pilha em Python puro: uma thread lê o frame atual da thread alvo
+    def __init__(self, thread_id, intervalo=INTERVALO_AMOSTRAGEM):
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.frames = []
+        self.indices = {}
+        self.amostras = []
+        self.pesos = []
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="amostrador-perfil", daemon=True)
+
+    def _indice(self, codigo):
+        chave = (codigo.co_name, codigo.co_filename, codigo.co_firstlineno)
+        indice = self.indices.get(chave)
+        if indice is None:
+            indice = self.indices[chave] = len(self.frames)
+            self.frames.append({"name": codigo.co_name, "file": codigo.co_filename, "line": codigo.co_firstlineno})
+        return indice
+
+    def _executar(self):
+        anterior = time.perf_counter()
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            agora = time.perf_counter()
+            if frame is None:
+                break
+            pilha = []
+            while frame is not None:
+                pilha.append(self._indice(frame.f_code))
+                frame = frame.f_back
+            pilha.reverse()  # Da raiz para a folha, como o speedscope espera
+            self.amostras.append(pilha)
+            self.pesos.append(agora - anterior)
+            anterior = agora
+
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+        self.duracao = time.perf_counter() - self.inicio
+
+    def speedscope(self, nome):
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": nome,
+            "exporter": "ggim perfil.py",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": nome,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.pesos),
+                "samples": self.amostras,
+                "weights": self.pesos,
+            }],
+        }
+
+
+def _base(pagina):
+    agora = datetime.datetime.now()
+    nome = unicodedata.normalize("NFKD", pagina).encode("ascii", "ignore").decode()
+    nome = re.sub(r"[^\w-]+", "_", nome).strip("_").lower()
+    return os.path.join(PASTA_PERFIS, f"{agora:%Y%m%d_%H%M%S}_{nome}"), agora
+
+
+@contextmanager
+def capturar(modo, pagina, metadados=None):
+    # Perfila o bloco (na thread atual) e grava o resultado em PASTA_PERFIS.
+    # Produz um dicionário que, ao final do bloco, contém "arquivo" e "metadados".
+    resultado = {}
+    base, agora = _base(pagina)
+    if modo == "deterministico":
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+    else:
+        perfilador = Amostrador(threading.get_ident())
+        perfilador.iniciar()
+    inicio = time.perf_counter()
+    try:
+        yield resultado
+    finally:
+        duracao = time.perf_counter() - inicio
+        os.makedirs(PASTA_PERFIS, exist_ok=True)
+        if modo == "deterministico":
+            perfilador.disable()
+            arquivo = base + ".pstats"
+            perfilador.dump_stats(arquivo)
+        else:
+            perfilador.parar()
+            arquivo = base + ".speedscope.json"
+            with open(arquivo, "w", encoding="utf-8") as f:
+                json.dump(perfilador.speedscope(f"{pagina} ({agora:%d/%m/%Y %H:%M:%S})"), f)
+        meta = dict(metadados or {}, pagina=pagina, modo=modo, capturado_em=agora.isoformat(timespec="seconds"),
+                    duracao_ms=round(duracao * 1000, 1), arquivo=os.path.basename(arquivo))
+        with open(base + ".meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        resultado.update(arquivo=arquivo, metadados=meta)
@@ -0,0 +1,247 @@
+# relatorios.py
+# Geração dos relatórios em PDF (por operação e geral), direto em memória (bytes)
+import datetime
+import json
+import os
+import threading
+from fpdf import FPDF
+
+LOGO = "logo_gcm.png"
+
+_logo = None
+_logo_lock = threading.Lock()
+
+
+def _info_logo():
+    # O PNG do logo é decodificado uma única vez por processo e reaproveitado em todos os documentos
+    # (a decodificação em Python puro do FPDF é a parte mais lenta de um relatório). Retorna None sem logo.
+    # Usa o formato interno de imagens do FPDF 1.7 (_parsepng / self.images): versão fixada em requirements.txt.
+    global _logo
+    if _logo is None:
+        with _logo_lock:
+            if _logo is None:
+                _logo = FPDF()._parsepng(LOGO) if os.path.exists(LOGO) else {}
+    return _logo or None
+
+# Formata data no padrão brasileiro
+def formatar_data_br(data):
+    return data.strftime("%d/%m/%Y") if data else ""
+
+# Nova Classe FPDF para incluir o cabeçalho e rodapé
+class PDF(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        logo = _info_logo()
+        if logo:
+            # Cópia: o FPDF descarta os dados da imagem do seu dicionário ao gravar o documento
+            self.images[LOGO] = dict(logo, i=1)
+
+    def header(self):
+        # Logo no canto superior esquerdo
+        if LOGO in self.images:
+            page_width = self.w
+            image_width = 40
+            x_centered = (page_width - image_width) / 2
+            self.image(LOGO, x_centered, 8, image_width)
+        # Título do cabeçalho
+        self.set_font('Arial', 'B', 15)
+        self.ln(25) # Move down after the logo for the title
+        self.cell(0, 10, 'Relatório de Operação GGIM', 0, 1, 'C')
+        self.ln(10) # Linha de quebra para descer o conteúdo
+
+    def footer(self):
+        # Posição a 1.5 cm do rodapé
+        self.set_y(-15)
+        # Seta a fonte para Arial Itálico 8
+        self.set_font('Arial', 'I', 8)
+        # Número da página
+        self.cell(0, 10, f'Página {self.page_no()}/{{nb}}', 0, 0, 'C')
+        # Data e Hora de Geração
+        current_datetime = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        self.set_x(10) # Volta para a margem esquerda para o texto da data/hora
+        self.cell(0, 10, f'Gerado em: {current_datetime}', 0, 0, 'L')
+
+
+def para_bytes(pdf):
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def gerar_pdf(op):
+    pdf = PDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    desenhar_operacao(pdf, op)
+    return para_bytes(pdf)
+
+# Escreve o conteúdo de uma operação a partir da página atual (usado também no PDF consolidado)
+def desenhar_operacao(pdf, op):
+    pdf.set_font("Arial", size=12)
+    line_height = 10
+    col_width = pdf.w / 2.2
+
+    # Informações gerais da operação (Edição, Nome, Data) - Ordem ajustada
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(col_width, line_height, txt="Edição:", border=0)
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, line_height, txt=op.edicao, ln=True, border=0)
+
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(col_width, line_height, txt="Nome da Operação:", border=0)
+    pdf.set_font("Arial", '', 12)
+    pdf.multi_cell(0, line_height, txt=op.nome_operacao, border=0)
+
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(col_width, line_height, txt="Data:", border=0)
+    pdf.set_font("Arial", '', 12)
+    pdf.cell(0, line_height, txt=formatar_data_br(op.data), ln=True, border=0)
+    pdf.ln(5) # Espaço após as informações básicas
+
+    # --- Forças Empregadas --- (Movido para cá)
+    if op.forcas:
+        forcas = json.loads(op.forcas)
+        # Filtra forças com viaturas > 0 para exibir no PDF
+        displayed_forcas = [f for f in forcas if f.get('viaturas', 0) > 0]
+        if displayed_forcas:
+            pdf.set_font("Arial", 'B', 12)
+            pdf.cell(0, line_height, txt="Forças Empregadas", ln=True, align="C")
+            pdf.ln(2)
+
+            # Cabeçalho da tabela de forças
+            pdf.set_fill_color(200, 220, 255)
+            force_name_col_width = (pdf.w - pdf.l_margin - pdf.r_margin) * 0.7
+            force_qty_col_width = (pdf.w - pdf.l_margin - pdf.r_margin) * 0.3
+            pdf.cell(force_name_col_width, line_height, txt="Força", border=1, fill=True, align='C')
+            pdf.cell(force_qty_col_width, line_height, txt="Viaturas", border=1, ln=True, fill=True, align='C')
+
+            pdf.set_font("Arial", '', 12)
+            for f in displayed_forcas:
+                pdf.cell(force_name_col_width, line_height, txt=f['nome'], border=1)
+                pdf.cell(force_qty_col_width, line_height, txt=str(f['viaturas']), border=1, ln=True)
+            pdf.ln(5)
+
+    # --- Apreensões Detalhadas --- (Movido para cá)
+    if op.apreensoes:
+        apreensoes_data = json.loads(op.apreensoes)
+        # Filtra apreensões com quantidade > 0 para exibir no PDF
+        displayed_apreensoes = [ap for ap in apreensoes_data if ap.get('quantidade', 0) > 0]
+        if displayed_apreensoes:
+            pdf.ln(2) # Pequena quebra antes das apreensões
+            pdf.set_font("Arial", 'B', 12)
+            pdf.cell(0, line_height, txt="Apreensões Realizadas:", ln=True, align="C")
+            pdf.ln(2) # Pequena quebra antes das apreensões
+            pdf.set_font("Arial", '', 12)
+            # Cabeçalho da tabela de apreensões
+            ap_type_col_width = (pdf.w - pdf.l_margin - pdf.r_margin) * 0.7
+            ap_qty_col_width = (pdf.w - pdf.l_margin - pdf.r_margin) * 0.3
+            pdf.set_fill_color(200, 220, 255)
+            pdf.cell(ap_type_col_width, line_height, txt="Tipo de Apreensão", border=1, fill=True, align='C')
+            pdf.cell(ap_qty_col_width, line_height, txt="Quantidade", border=1, ln=True, fill=True, align='C')
+            for ap in displayed_apreensoes:
+                pdf.cell(ap_type_col_width, line_height, txt=ap.get('tipo', 'N/A'), border=1)
+                pdf.cell(ap_qty_col_width, line_height, txt=str(ap.get('quantidade', 0)), border=1, ln=True)
+            pdf.ln(5)
+
+
+    # --- Tabela de Resultados --- (Movido para cá)
+    data_resultados = {
+        "Pessoas Abordadas": op.pessoas_abordadas,
+        "Estabelecimentos Fiscalizados": op.estabelecimentos_fiscalizados,
+        "Pessoas Conduzidas": op.pessoas_conduzidas,
+        "TCOs Lavrados": op.tco,
+        "Estabelecimentos Interditados": op.interditados,
+    }
+    # Filtra resultados com quantidade > 0 para exibir no PDF
+    displayed_resultados = {metrica: quantidade for metrica, quantidade in data_resultados.items() if quantidade > 0}
+
+    if displayed_resultados:
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, line_height, txt="Resultados da Operação", ln=True, align="C")
+        pdf.ln(2)
+
+        # Cabeçalho da tabela de resultados
+        pdf.set_fill_color(200, 220, 255)
+        table_col_width = (pdf.w - pdf.l_margin - pdf.r_margin) / 2
+        pdf.cell(table_col_width, line_height, txt="Métrica", border=1, fill=True, align='C')
+        pdf.cell(table_col_width, line_height, txt="Quantidade/Detalhes", border=1, ln=True, fill=True, align='C')
+
+        pdf.set_font("Arial", '', 12)
+        for metrica, quantidade in displayed_resultados.items():
+            pdf.cell(table_col_width, line_height, txt=metrica, border=1)
+            pdf.cell(table_col_width, line_height, txt=str(quantidade), border=1, ln=True)
+        pdf.ln(5)
+
+    # Locais (Movido para cá)
+    # Apenas exibe se houver conteúdo
+    if op.locais:
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(col_width, line_height, txt="Locais:", border=0)
+        pdf.set_font("Arial", '', 12)
+        pdf.multi_cell(0, line_height, txt=op.locais, border=0)
+        pdf.ln(5)
+
+    # Setores (Movido para cá)
+    # Apenas exibe se houver conteúdo
+    if op.descricao:
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(col_width, line_height, txt="Setores:", border=0)
+        pdf.set_font("Arial", '', 12)
+        pdf.multi_cell(0, line_height, txt=op.descricao, border=0)
+        pdf.ln(5)
+
+# Nova função para gerar o relatório geral em PDF
+def gerar_relatorio_geral_pdf(total_data):
+    pdf = PDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, 'Relatório Geral das Operações GGIM', 0, 1, 'C')
+    pdf.ln(10)
+
+    pdf.set_font("Arial", '', 12)
+    line_height = 8
+
+    # Resumo Geral
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, line_height, "Resultados Totais:", ln=True)
+    pdf.ln(2)
+    pdf.set_font("Arial", '', 12)
+
+    data_items = [
+        ("Pessoas Abordadas", total_data["pessoas_abordadas"]),
+        ("Estabelecimentos Fiscalizados", total_data["estabelecimentos_fiscalizados"]),
+        ("Pessoas Conduzidas", total_data["pessoas_conduzidas"]),
+        ("TCOs Lavrados", total_data["tco"]),
+        ("Estabelecimentos Interditados", total_data["interditados"]),
+        ("Total de Apreensões", total_data["total_apreensoes"]),
+        ("Total de Viaturas Empregadas", total_data["total_viaturas_empregadas"])
+    ]
+
+    for label, value in data_items:
+        pdf.cell(pdf.w / 2 - pdf.l_margin, line_height, txt=f"{label}:", border=0)
+        pdf.cell(0, line_height, txt=str(value), ln=True, border=0)
+
+    pdf.ln(10)
+
+    # Detalhes das Apreensões (se houver)
+    if total_data["detalhes_apreensoes"]:
+        pdf.set_font("Arial", 'B', 14)
+        pdf.cell(0, line_height, "Detalhes das Apreensões por Tipo:", ln=True)
+        pdf.ln(2)
+        pdf.set_font("Arial", '', 12)
+        for tipo, quantidade in total_data["detalhes_apreensoes"].items():
+            pdf.cell(pdf.w / 2 - pdf.l_margin, line_height, txt=f"{tipo}:", border=0)
+            pdf.cell(0, line_height, txt=str(quantidade), ln=True, border=0)
+        pdf.ln(10)
+    
+    # Detalhes das Forças (se houver)
+    if total_data["detalhes_forcas"]:
+        pdf.set_font("Arial", 'B', 14)
+        pdf.cell(0, line_height, "Detalhes das Forças Empregadas:", ln=True)
+        pdf.ln(2)
+        pdf.set_font("Arial", '', 12)
+        for forca_nome, viaturas in total_data["detalhes_forcas"].items():
+            pdf.cell(pdf.w / 2 - pdf.l_margin, line_height, txt=f"{forca_nome}:", border=0)
+            pdf.cell(0, line_height, txt=f"{viaturas} viaturas", ln=True, border=0)
+        pdf.ln(10)
+
+    return para_bytes(pdf)
@@ -0,0 +1,156 @@
+# servicos.py
+# Camada de serviço sobre as operações, usada pela interface (main.py) e pela API HTTP (api.py).
+# As gravações mantêm juntos, na mesma transação, a operação, as tabelas normalizadas, o resumo
+# materializado e as referências das imagens; depois do commit invalidam o cache de PDFs. Elas
+# são executadas pelo escritor único (escritor.py), com a sessão dele, e recebem ids em vez de
+# objetos da sessão de quem chama.
+import datetime
+import json
+import escritor
+import pdf_cache
+from sqlalchemy.orm.exc import StaleDataError
+from db import Operacao, definir_apreensoes, definir_forcas, definir_locais, resolver_ids, atualizar_resumo, ajustar_referencias
+from consultas import listar_cabecalhos, calcular_totais, ler_resumo, tem_filtro
+
+CAMPOS = [
+    "edicao", "nome_operacao", "data", "descricao", "locais",
+    "pessoas_abordadas", "estabelecimentos_fiscalizados", "pessoas_conduzidas", "tco", "interditados",
+]
+
+MENSAGEM_CONFLITO = (
+    "A operação foi alterada por outra pessoa depois que você a abriu. "
+    "Cancele e abra novamente para ver a versão atual antes de editar."
+)
+
+
+class ConflitoEdicao(Exception):
+    # A operação mudou (ou foi excluída) desde que foi lida: a gravação não sobrescreve
+    pass
+
+
+def _lista_json(valor):
+    # Lista gravada como JSON na operação; conteúdo inválido é tratado como lista vazia
+    try:
+        return json.loads(valor) if valor else []
+    except json.JSONDecodeError:
+        return []
+
+
+def criar_operacao(campos, apreensoes, forcas, imagens=()):
+    # `campos` com os valores de CAMPOS; `imagens` já salvas com imagens.salvar_imagem.
+    # Retorna o id da operação criada.
+    def tarefa(session):
+        caches = resolver_ids(session, apreensoes, forcas, campos.get("locais"))
+        op = Operacao(**campos, imagens=json.dumps(list(imagens)))
+        definir_apreensoes(session, op, apreensoes, caches["tipos"])
+        definir_forcas(session, op, forcas, caches["forcas"])
+        definir_locais(session, op, caches["locais"])
+        session.add(op)
+        atualizar_resumo(session, op, 1)
+        ajustar_referencias(session, list(imagens), 1)
+        session.flush()
+        return op.id
+    return escritor.executar(tarefa)
+
+
+def atualizar_operacao(op_id, versao, campos, apreensoes, forcas, imagens=None):
+    # `versao` é a de quando a operação foi aberta para edição: se outra pessoa a alterou
+    # depois disso, nada é gravado e ConflitoEdicao é levantada.
+    # `imagens=None` mantém as imagens atuais; uma lista substitui todas. Retorna a nova versão.
+    def tarefa(session):
+        op = session.get(Operacao, op_id)
+        if op is None:
+            raise ConflitoEdicao("A operação foi excluída por outra pessoa.")
+        if op.versao != versao:
+            raise ConflitoEdicao(MENSAGEM_CONFLITO)
+        # Todas as consultas antes de alterar a operação, que assim é gravada em um único UPDATE
+        # (um passo de versão); sem autoflush, os carregamentos das coleções não a gravam pela metade
+        caches = resolver_ids(session, apreensoes, forcas, campos.get("locais", op.locais))
+        # Retira os valores antigos do resumo; os novos são somados após a edição
+        atualizar_resumo(session, op, -1)
+        if imagens is not None:
+            ajustar_referencias(session, _lista_json(op.imagens), -1)
+            ajustar_referencias(session, list(imagens), 1)
+        with session.no_autoflush:
+            if imagens is not None:
+                op.imagens = json.dumps(list(imagens))
+            elif not op.imagens:
+                op.imagens = json.dumps([])
+            for campo, valor in campos.items():
+                setattr(op, campo, valor)
+            definir_apreensoes(session, op, apreensoes, caches["tipos"])
+            definir_forcas(session, op, forcas, caches["forcas"])
+            definir_locais(session, op, caches["locais"])
+        atualizar_resumo(session, op, 1)
+        session.flush()
+        return op.versao
+    try:
+        nova_versao = escritor.executar(tarefa)
+    except StaleDataError:
+        # Alterada por outro processo entre a leitura e o UPDATE (a versão no WHERE não bateu)
+        raise ConflitoEdicao(MENSAGEM_CONFLITO)
+    pdf_cache.invalidar(op_id)
+    return nova_versao
+
+
+def excluir_operacao(op_id):
+    # Os arquivos de imagem são apagados pela coleta quando ficam sem referências
+    def tarefa(session):
+        op = session.get(Operacao, op_id)
+        if op is None:
+            raise ConflitoEdicao("A operação já foi excluída por outra pessoa.")
+        ajustar_referencias(session, _lista_json(op.imagens), -1)
+        atualizar_resumo(session, op, -1)
+        session.delete(op)
+    try:
+        escritor.executar(tarefa)
+    except StaleDataError:
+        raise ConflitoEdicao(MENSAGEM_CONFLITO)
+    pdf_cache.invalidar(op_id)
+
+
+def obter_operacao(session, op_id):
+    return session.get(Operacao, op_id)
+
+
+def pdf_operacao(op):
+    # Bytes do PDF da operação (do cache enquanto a operação não muda)
+    from relatorios import gerar_pdf  # fpdf só é importado por quem gera PDFs
+    return pdf_cache.obter_pdf(op, gerar_pdf)
+
+
+def totais(session, inicio=None, fim=None, edicoes=None):
+    # Totais do Relatório Geral: do resumo materializado sem filtros; agregados no banco com filtros
+    if tem_filtro(inicio, fim, edicoes):
+        return calcular_totais(session, inicio, fim, edicoes)
+    return ler_resumo(session)
+
+
+def operacao_para_dict(op):
+    dados = {"id": op.id, "versao": op.versao}
+    dados.update({campo: getattr(op, campo) for campo in CAMPOS})
+    dados["data"] = op.data.isoformat() if op.data else None
+    dados["apreensoes"] = _lista_json(op.apreensoes)
+    dados["forcas"] = _lista_json(op.forcas)
+    dados["imagens"] = _lista_json(op.imagens)
+    return dados
+
+
+def _cursor(cabecalho):
+    return f"{cabecalho.data.isoformat()}_{cabecalho.id}"
+
+
+def _ler_cursor(cursor):
+    data, op_id = cursor.rsplit("_", 1)
+    return datetime.date.fromisoformat(data), int(op_id)
+
+
+def pagina_operacoes(session, limite, cursor=None):
+    # Uma página da listagem (mais recentes primeiro) e o cursor da próxima página, ou None.
+    # O cursor é opaco para o cliente: "<data>_<id>" do último item (paginação por chave).
+    cabecalhos, tem_proxima = listar_cabecalhos(session, limite, _ler_cursor(cursor) if cursor else None)
+    itens = [
+        {"id": cab.id, "edicao": cab.edicao, "nome_operacao": cab.nome_operacao, "data": cab.data.isoformat() if cab.data else None}
+        for cab in cabecalhos
+    ]
+    return itens, _cursor(cabecalhos[-1]) if tem_proxima else None
@@ -0,0 +1,314 @@
+# teste_carga.py
+# Teste de carga da interface: várias sessões simultâneas do Streamlit sem navegador (AppTest),
+# cada uma percorrendo o roteiro login -> cadastro -> listagem -> análise -> relatório geral;
+# são medidos a duração de cada interação (uma execução completa do script) e os erros por
+# página, com números crescentes de sessões.
+#
+# As sessões rodam em threads de um único processo, como no `streamlit run` (uma thread por
+# execução do script): compartilham o engine e o pool de conexões, o escritor único
+# (escritor.py) e os caches (st.cache_data/st.cache_resource). O AppTest foi feito para uma
+# execução por vez: a cada execução cria e apaga o Runtime, recompila o script e liga a opção
+# global.appTest só durante a execução. Para as execuções simultâneas, _servidor_unico deixa um
+# Runtime, um cache do script e a opção fixos para o processo inteiro, como no servidor.
+#
+# Com --processos, cada sessão roda em um processo próprio (vários servidores com um usuário
+# cada sobre o mesmo banco): cada processo tem o próprio engine, escritor e caches, e o teste
+# mede a disputa pelos locks do banco entre escritores independentes.
+#
+# O roteiro cadastra operações: use um banco descartável (ou --somente-leitura).
+#
+#   python gerar_dados.py 20000 --banco sqlite:///carga.db --sem-imagens
+#   python teste_carga.py --banco sqlite:///carga.db --usuarios 1 5 10 20 --ciclos 3
+#   python teste_carga.py --banco sqlite:///carga.db --usuarios 5 10 --processos
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import db
+from db import get_session, fechar_session, inicializar_banco, Operacao, Usuario
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+USUARIO = "teste_carga"
+SENHA = "teste_carga"
+PAGINAS = ["Login", "Cadastrar Operação", "Visualizar Operações", "Análise de Dados", "Relatório Geral"]
+PERCENTIS = [50, 90, 95, 99]
+
+
+class Sessao:
+    # Uma aba do navegador: AppTest com o próprio session_state
+    def __init__(self, numero, tempo_limite):
+        from streamlit.testing.v1 import AppTest
+        self.numero = numero
+        self.registros = []
+        self.app = AppTest.from_file(SCRIPT, default_timeout=tempo_limite)
+
+    def interagir(self, pagina, acao):
+        # Executa `acao` (que termina em uma execução do script) e registra (página, ms, erro)
+        inicio = time.perf_counter()
+        try:
+            acao()
+            erros = [e.value for e in self.app.exception] + [e.value for e in self.app.error]
+            erro = str(erros[0]) if erros else None
+        except Exception as e:
+            erro = repr(e)
+        self.registros.append((pagina, (time.perf_counter() - inicio) * 1000, erro))
+        return erro is None
+
+
+def _ir(app, pagina):
+    app.sidebar.selectbox(key="main_menu").select(pagina).run()
+
+
+def _cadastrar(app, nome):
+    chave = f"form_operacao_cadastro_key_{app.session_state['cadastro_form_submit_count']}"
+    app.text_input(key=f"edicao_cad_{chave}").input("Teste de carga")
+    app.text_input(key=f"nome_op_cad_{chave}").input(nome)
+    app.text_area(key=f"locais_cad_{chave}").input("Local do teste de carga")
+    next(botao for botao in app.button if botao.label == "Salvar Operação").click().run()
+
+
+def _abrir_primeira(app):
+    next(botao for botao in app.button if (botao.key or "").startswith("abrir_op_")).click().run()
+
+
+def _trocar_agrupamento(app, ciclo):
+    seletor = app.selectbox(key="agrupamento_analise")
+    seletor.select(seletor.options[ciclo % len(seletor.options)]).run()
+
+
+def roteiro(sessao, ciclos, somente_leitura):
+    # O que cada usuário simulado faz: entra uma vez e repete o percurso pelas páginas
+    app = sessao.app
+    sessao.interagir("Login", app.run)
+    app.text_input(key="login_username").input(USUARIO)
+    app.text_input(key="login_password").input(SENHA)
+    if not sessao.interagir("Login", lambda: app.button(key="login_button").click().run()):
+        return
+    for ciclo in range(ciclos):
+        if not somente_leitura:
+            sessao.interagir("Cadastrar Operação", lambda: _ir(app, "Cadastrar Operação"))
+            sessao.interagir("Cadastrar Operação", lambda: _cadastrar(app, f"Carga {sessao.numero}-{ciclo}"))
+        sessao.interagir("Visualizar Operações", lambda: _ir(app, "Visualizar Operações"))
+        sessao.interagir("Visualizar Operações", lambda: _abrir_primeira(app))
+        sessao.interagir("Visualizar Operações", lambda: app.button(key="proxima_pagina").click().run())
+        sessao.interagir("Análise de Dados", lambda: _ir(app, "Análise de Dados"))
+        sessao.interagir("Análise de Dados", lambda: _trocar_agrupamento(app, ciclo))
+        sessao.interagir("Relatório Geral", lambda: _ir(app, "Relatório Geral"))
+
+
+def _percentil(ordenados, p):
+    # `ordenados` em ordem crescente, como em benchmark.medir
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+def resumir(registros, segundos):
+    # {página: estatísticas} de um número de sessões simultâneas
+    resumo = {}
+    for pagina in PAGINAS:
+        tempos = sorted(ms for nome, ms, _ in registros if nome == pagina)
+        if not tempos:
+            continue
+        erros = [erro for nome, _, erro in registros if nome == pagina and erro]
+        resumo[pagina] = {
+            "interacoes": len(tempos),
+            "erros": len(erros),
+            "taxa_erros": round(len(erros) / len(tempos), 4),
+            **{f"p{p}_ms": round(_percentil(tempos, p), 1) for p in PERCENTIS},
+            "max_ms": round(tempos[-1], 1),
+            "exemplo_erro": erros[0] if erros else None,
+        }
+    total = len(registros)
+    resumo["total"] = {
+        "interacoes": total,
+        "erros": sum(1 for _, _, erro in registros if erro),
+        "taxa_erros": round(sum(1 for _, _, erro in registros if erro) / total, 4) if total else 0,
+        "interacoes_por_segundo": round(total / segundos, 2) if segundos else 0,
+        "segundos": round(segundos, 1),
+    }
+    return resumo
+
+
+def _servidor_unico():
+    # Um Runtime, um cache do script compilado e a opção global.appTest para todas as sessões do
+    # processo, como no servidor. Sem isso, o fim de uma execução apaga o Runtime (e desliga a
+    # opção) no meio das execuções das outras sessões, e a compilação simultânea do script falha
+    # no Python 3.11 ("AST constructor recursion depth mismatch")
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    componentes = BidiComponentManager()
+    componentes.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = componentes
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    script = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script
+    config.set_option("global.appTest", True)
+
+
+def _aquecer(tempo_limite):
+    # Importa as páginas e faz a primeira execução (cache_resource) antes de medir
+    from streamlit.testing.v1 import AppTest
+    from paginas import PAGINAS as MODULOS
+    for modulo in MODULOS.values():
+        importlib.import_module(modulo)
+    AppTest.from_file(SCRIPT, default_timeout=tempo_limite).run()
+
+
+def executar_nivel(usuarios, ciclos, somente_leitura, tempo_limite):
+    # Todas as sessões em threads deste processo, partindo juntas
+    sessoes = [Sessao(numero, tempo_limite) for numero in range(usuarios)]
+    largada = threading.Barrier(usuarios + 1)
+
+    def executar(sessao):
+        largada.wait()
+        roteiro(sessao, ciclos, somente_leitura)
+
+    threads = [threading.Thread(target=executar, args=(sessao,), name=f"sessao-{sessao.numero}") for sessao in sessoes]
+    for thread in threads:
+        thread.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return resumir([registro for sessao in sessoes for registro in sessao.registros], time.perf_counter() - inicio)
+
+
+def sessao_em_processo(numero, ciclos, somente_leitura, tempo_limite):
+    # Executado no processo filho (--processos): aquece o processo, espera o sinal de início na
+    # entrada padrão e devolve os registros como JSON na última linha da saída
+    _aquecer(tempo_limite)
+    sessao = Sessao(numero, tempo_limite)
+    print("pronto", flush=True)
+    sys.stdin.readline()
+    roteiro(sessao, ciclos, somente_leitura)
+    print(json.dumps(sessao.registros, ensure_ascii=False))
+
+
+def executar_nivel_processos(usuarios, ciclos, somente_leitura, tempo_limite, banco):
+    comando = [sys.executable, __file__, "--ciclos", str(ciclos), "--tempo-limite", str(tempo_limite)]
+    if somente_leitura:
+        comando.append("--somente-leitura")
+    ambiente = dict(os.environ, GGIM_BANCO_URL=banco)
+    # A saída de erros (avisos do Streamlit) é descartada para não encher o pipe e travar o filho
+    processos = [
+        subprocess.Popen(comando + ["--sessao", str(numero)], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                         stderr=subprocess.DEVNULL, text=True, env=ambiente)
+        for numero in range(usuarios)
+    ]
+    for processo in processos:
+        processo.stdout.readline()  # "pronto"
+    inicio = time.perf_counter()
+    for processo in processos:
+        processo.stdin.write("\n")
+        processo.stdin.flush()
+    registros = []
+    for processo in processos:
+        saida, _ = processo.communicate()
+        linhas = saida.strip().splitlines()
+        if processo.returncode != 0 or not linhas:
+            registros.append(("Login", 0.0, f"processo do usuário terminou com código {processo.returncode}"))
+            continue
+        registros.extend(tuple(registro) for registro in json.loads(linhas[-1]))
+    return resumir(registros, time.perf_counter() - inicio)
+
+
+def _preparar():
+    # Usuário do teste e verificação de que o banco tem dados para as páginas de leitura
+    session = get_session()
+    try:
+        if session.query(Usuario).filter_by(username=USUARIO).first() is None:
+            session.add(Usuario(username=USUARIO, senha=SENHA))
+            session.commit()
+        return session.query(Operacao).count()
+    finally:
+        fechar_session()
+
+
+def imprimir(usuarios, resumo, processos):
+    sessoes = "processo(s) simultâneo(s), um usuário cada" if processos else "sessão(ões) simultânea(s) no mesmo processo"
+    print(f"\n{usuarios} {sessoes}: {resumo['total']['interacoes']} interações em "
+          f"{resumo['total']['segundos']}s ({resumo['total']['interacoes_por_segundo']}/s), "
+          f"{resumo['total']['taxa_erros']:.1%} com erro")
+    print(f"{'página':22} {'n':>5} {'erros':>6} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTIS) + f" {'máx':>8}")
+    for pagina in PAGINAS:
+        if pagina in resumo:
+            medida = resumo[pagina]
+            print(f"{pagina:22} {medida['interacoes']:5d} {medida['taxa_erros']:6.1%} "
+                  + " ".join(f"{medida[f'p{p}_ms']:8.0f}" for p in PERCENTIS) + f" {medida['max_ms']:8.0f}")
+            if medida["exemplo_erro"]:
+                print(f"{'':22} erro: {medida['exemplo_erro'][:100]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da interface com sessões simultâneas")
+    parser.add_argument("--banco", help="URL do banco usado no teste (padrão: o banco do sistema)")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[1, 5, 10, 20], help="Números de sessões simultâneas (padrão: 1 5 10 20)")
+    parser.add_argument("--processos", action="store_true", help="Uma sessão por processo em vez de todas em threads de um processo")
+    parser.add_argument("--ciclos", type=int, default=3, help="Repetições do roteiro por usuário (padrão: 3)")
+    parser.add_argument("--somente-leitura", action="store_true", help="Não cadastra operações")
+    parser.add_argument("--tempo-limite", type=float, default=60, help="Segundos por execução do script antes de contar como erro (padrão: 60)")
+    parser.add_argument("--sessao", type=int, help=argparse.SUPPRESS)  # Uso interno: processo filho
+    parser.add_argument("--saida", default=f"carga_{datetime.datetime.now():%Y%m%d_%H%M%S}.json", help="Arquivo JSON de resultados")
+    args = parser.parse_args()
+
+    if args.sessao is not None:
+        sessao_em_processo(args.sessao, args.ciclos, args.somente_leitura, args.tempo_limite)
+        return
+
+    if args.banco:
+        db.DATABASE_URL = args.banco
+    inicializar_banco()
+    operacoes = _preparar()
+    if not operacoes:
+        raise SystemExit("O banco não tem operações; gere dados antes com gerar_dados.py.")
+
+    if not args.processos:
+        _servidor_unico()
+        _aquecer(args.tempo_limite)
+    niveis = {}
+    for usuarios in args.usuarios:
+        if args.processos:
+            niveis[usuarios] = executar_nivel_processos(usuarios, args.ciclos, args.somente_leitura, args.tempo_limite, db.DATABASE_URL)
+        else:
+            niveis[usuarios] = executar_nivel(usuarios, args.ciclos, args.somente_leitura, args.tempo_limite)
+        imprimir(usuarios, niveis[usuarios], args.processos)
+
+    resultado = {
+        "executado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "banco": db.DATABASE_URL,
+        "operacoes": operacoes,
+        "ciclos": args.ciclos,
+        "somente_leitura": args.somente_leitura,
+        "cenario": ("um processo (engine, escritor e caches próprios) por sessão" if args.processos
+                    else "sessões em threads de um processo (engine, escritor e caches compartilhados)"),
+        "niveis": niveis,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {args.saida}.")
+
+
+if __name__ == "__main__":
+    main()